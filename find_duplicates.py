@@ -0,0 +1,99 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from rich import print
+
+from ytmd.fingerprint import FingerprintIndex, FingerprintUnavailable, compute_fingerprint
+
+
+def _fingerprint_file(file_path):
+    """Worker entry point: returns (path, mtime, algorithm, fingerprint or error)."""
+    mtime = os.path.getmtime(file_path)
+    try:
+        algorithm, fingerprint = compute_fingerprint(file_path)
+        return file_path, mtime, algorithm, fingerprint, None
+    except FingerprintUnavailable as e:
+        return file_path, mtime, None, None, e
+    except Exception as e:
+        return file_path, mtime, None, None, e
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find likely duplicate recordings in a download library by audio fingerprint.")
+    parser.add_argument("path", nargs="?", default="download", help="Library directory to scan (default: download)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of parallel fingerprinting processes.")
+    parser.add_argument("--rescan", action="store_true", help="Fingerprint every file, even if unchanged since the last scan.")
+
+    args = parser.parse_args()
+
+    root = os.path.abspath(args.path)
+    if not os.path.isdir(root):
+        print(f"[bold red]Error:[/bold red] Directory '{args.path}' does not exist.")
+        return
+
+    index = FingerprintIndex(root=root)
+    removed = index.prune_missing()
+    if removed:
+        print(f"[dim]Removed {removed} missing files from the index.[/dim]")
+
+    mp3_files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Skip staging directories and other hidden folders
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in filenames:
+            if filename.lower().endswith('.mp3'):
+                mp3_files.append(os.path.join(dirpath, filename))
+
+    to_scan = [f for f in mp3_files if args.rescan or index.get_mtime(f) != os.path.getmtime(f)]
+    print(f"[bold cyan]Scanning {len(to_scan)} of {len(mp3_files)} files with {args.workers} workers...[/bold cyan]")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(_fingerprint_file, f) for f in to_scan]
+        for future in as_completed(futures):
+            file_path, mtime, algorithm, fingerprint, error = future.result()
+            if isinstance(error, FingerprintUnavailable):
+                print(f"[bold red]Error:[/bold red] {error}")
+                executor.shutdown(cancel_futures=True)
+                return
+            if error:
+                print(f"[red]Failed to fingerprint {file_path}: {error}[/red]")
+                continue
+            index.add(file_path, algorithm, fingerprint, mtime=mtime)
+
+    # Group matches: each file is linked to its closest indexed neighbour
+    parent = {}
+
+    def find(path):
+        while parent.get(path, path) != path:
+            path = parent[path]
+        return path
+
+    for file_path in mp3_files:
+        stored = index.get_fingerprint(file_path)
+        if not stored:
+            continue
+        match = index.find_match(stored[0], stored[1], exclude_path=file_path)
+        if match:
+            parent[find(file_path)] = find(os.path.abspath(match[0]))
+
+    groups = {}
+    for file_path in list(parent):
+        groups.setdefault(find(file_path), set()).add(file_path)
+    for root_path, members in groups.items():
+        members.add(root_path)
+
+    index.close()
+
+    if not groups:
+        print("[bold green]No duplicates found.[/bold green]")
+        return
+
+    for members in groups.values():
+        print("[yellow]Possible duplicates:[/yellow]")
+        for member in sorted(members):
+            print(f"  - {os.path.relpath(member, root)}")
+
+    print(f"\n[bold green]Found {len(groups)} duplicate groups.[/bold green]")
+
+if __name__ == "__main__":
+    main()
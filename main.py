@@ -1,11 +1,12 @@
 import argparse
 import sys
 from ytmd.downloader import fetch_info, download_media
+from ytmd.control import JobControl
 from ytmd.ui import display_summary_table
 from ytmd.tui import run_tui_app
 from rich import print
 
-def process_url(url: str):
+def process_url(url: str, replaygain: bool = False, split_chapters: bool = False, dedupe: str = None, metadata_map: str = None, title_rules: str = None, raw_titles: bool = False):
     """
     Process a single URL: fetch metadata, display UI, and download.
     """
@@ -21,7 +22,15 @@ def process_url(url: str):
         print()
         
         # 4. Download
-        download_media(url, info)
+        # Ctrl-C now cancels cooperatively: finished tracks are kept and partial files are removed
+        control = JobControl()
+        restore_signals = control.install_signal_handlers(print)
+        try:
+            download_media(url, info, replaygain=replaygain, split_chapters=split_chapters, dedupe=dedupe, metadata_map=metadata_map, title_rules=title_rules, raw_titles=raw_titles, control=control)
+        finally:
+            restore_signals()
+        if control.cancelled:
+            sys.exit(1)
         
     except KeyboardInterrupt:
         print("\n\n[bold red]Download cancelled by user.[/bold red]")
@@ -33,16 +42,57 @@ def process_url(url: str):
 def main():
     parser = argparse.ArgumentParser(description="YouTube MP3 Downloader CLI")
     parser.add_argument("url", nargs="?", help="YouTube Video or Playlist URL (Optional, opens UI if omitted)")
+    parser.add_argument("--replaygain", action="store_true", help="Analyze loudness and write ReplayGain track/album tags")
+    parser.add_argument("--split", action="store_true", help="Split full-album videos and mixes into tracks by chapters (or silence)")
+    parser.add_argument("--dedupe", choices=["flag", "skip"], help="Fingerprint each track and flag or skip likely duplicates already in download/")
+    parser.add_argument("--metadata-map", metavar="FILE", help="JSON/CSV mapping used to fill missing artist/album/year")
+    parser.add_argument("--title-rules", metavar="FILE", help="JSON rules file for title cleanup")
+    parser.add_argument("--raw-titles", action="store_true", help="Keep video titles unchanged in filenames and tags")
+    parser.add_argument("--sync", metavar="CONFIG", help="Mirror the playlists listed in a JSON config file")
+    parser.add_argument("--interval", type=int, help="Seconds between sync cycles (overrides the config)")
+    parser.add_argument("--once", action="store_true", help="Run a single sync cycle and exit")
+    parser.add_argument("--batch", metavar="FILE", help="Queue the URLs in FILE (one per line) into the job file and process them")
+    parser.add_argument("--jobs", metavar="PATH", help="Shared SQLite job file for batch mode (default: download/.ytmd-jobs.sqlite)")
+    parser.add_argument("--workers", type=int, default=2, help="Number of local worker processes in batch mode (0 only queues)")
+    parser.add_argument("--shard", metavar="I/N", help="Process only shard I of N of the job file in this process (e.g. one per host)")
     
     args = parser.parse_args()
     
     url = args.url
-    if not url:
+    if args.sync:
+        from ytmd.sync import run_sync
+        try:
+            run_sync(args.sync, interval=args.interval, once=args.once)
+        except KeyboardInterrupt:
+            print("\n\n[bold red]Sync stopped by user.[/bold red]")
+    elif args.batch or args.jobs or args.shard:
+        from ytmd.shard import JOBS_FILENAME, parse_shard, read_url_list, run_batch
+        from ytmd.output import DOWNLOAD_ROOT
+        import os
+        if args.replaygain:
+            # Album gain needs the whole album, but a playlist's entries are spread over workers
+            print("[bold red]Error:[/bold red] --replaygain is not supported in batch mode")
+            sys.exit(1)
+        try:
+            shard = parse_shard(args.shard) if args.shard else None
+            urls = read_url_list(args.batch) if args.batch else []
+        except (OSError, ValueError) as e:
+            print(f"[bold red]Error:[/bold red] {e}")
+            sys.exit(1)
+        if url:
+            urls.append(url)
+        options = {'split_chapters': args.split, 'dedupe': args.dedupe, 'metadata_map': args.metadata_map,
+                   'title_rules': args.title_rules, 'raw_titles': args.raw_titles}
+        try:
+            run_batch(args.jobs or os.path.join(DOWNLOAD_ROOT, JOBS_FILENAME), urls, workers=args.workers, shard=shard, options=options)
+        except KeyboardInterrupt:
+            print("\n\n[bold red]Batch stopped by user. Claimed entries were released.[/bold red]")
+    elif not url:
         # Enable full TUI Downloader automatically
         run_tui_app()
     else:
         # Run pure CLI mode for automation
-        process_url(url)
+        process_url(url, replaygain=args.replaygain, split_chapters=args.split, dedupe=args.dedupe, metadata_map=args.metadata_map, title_rules=args.title_rules, raw_titles=args.raw_titles)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,256 @@
+import hashlib
+import http.client
+import os
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Optional, Tuple
+
+USER_AGENT = 'Mozilla/5.0'
+CONNECT_TIMEOUT = 10       # seconds per socket operation
+TOTAL_TIMEOUT = 30         # seconds for the whole transfer
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+MAX_REDIRECTS = 5
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 12
+
+# Errors from a kept-alive connection the server closed while it sat idle in the pool
+STALE_CONNECTION_ERRORS = (http.client.BadStatusLine, ConnectionError)
+
+
+class ArtworkFetchError(Exception):
+    """Raised when a cover image cannot be fetched."""
+
+
+class InvalidImageError(ArtworkFetchError):
+    """Raised when the response body is not a supported image format."""
+
+
+def sniff_image_type(header: bytes) -> Optional[str]:
+    """Return the file extension for an image header, or None if it is not an image."""
+    if header.startswith(b'\xff\xd8\xff'):
+        return '.jpg'
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return '.png'
+    if header.startswith(b'GIF8'):
+        return '.gif'
+    if header.startswith(b'RIFF') and len(header) >= 12 and header[8:12] == b'WEBP':
+        return '.webp'
+    return None
+
+
+class ConnectionPool:
+    """A tiny keep-alive pool of http.client connections keyed by (scheme, host, port)."""
+
+    def __init__(self, max_per_host: int = 4, timeout: float = CONNECT_TIMEOUT):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self._idle: Dict[Tuple[str, str, int], List[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, scheme: str, host: str, port: int, fresh: bool = False) -> http.client.HTTPConnection:
+        """Return an idle connection to the host, or a new one (always new with `fresh`)."""
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle and not fresh:
+                return idle.pop()
+        if scheme == 'https':
+            return http.client.HTTPSConnection(host, port, timeout=self.timeout)
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    def release(self, scheme: str, host: str, port: int, conn: http.client.HTTPConnection) -> None:
+        key = (scheme, host, port)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+
+class ArtworkFetcher:
+    """
+    Fetches cover images over a pooled HTTP client. Downloaded images go into
+    the content-addressed ImageStore, and a small reference file keyed by the
+    SHA-256 of the URL points at them, so a cover shared by many jobs is
+    downloaded only once.
+    """
+
+    def __init__(self, store=None, max_bytes: int = MAX_IMAGE_BYTES, timeout: float = TOTAL_TIMEOUT, pool: ConnectionPool = None):
+        if store is None:
+            from ytmd.image_store import get_image_store
+            store = get_image_store()
+        self.store = store
+        self.cache_dir = os.path.join(store.root, 'urls')
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.pool = pool or ConnectionPool()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+
+    def cache_key(self, url: str) -> str:
+        return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+    def cached(self, url: str):
+        """Return the stored image for a URL if it has been fetched before."""
+        ref_path = os.path.join(self.cache_dir, self.cache_key(url))
+        try:
+            with open(ref_path, 'r') as f:
+                digest = f.read().strip()
+        except OSError:
+            return None
+        return self.store.get(digest)
+
+    def fetch(self, url: str):
+        """Return the StoredImage for the image at `url`, downloading it if necessary."""
+        # Serialise concurrent fetches of the same URL so it is only downloaded once
+        key = self.cache_key(url)
+        with self._lock:
+            url_lock = self._inflight.setdefault(key, threading.Lock())
+        with url_lock:
+            image = self.cached(url)
+            if image:
+                return image
+            tmp_path = self._download(url, key)
+            try:
+                image = self.store.add_file(tmp_path)
+            except ValueError as e:
+                raise InvalidImageError(str(e)) from e
+            finally:
+                os.remove(tmp_path)
+            with open(os.path.join(self.cache_dir, key), 'w') as f:
+                f.write(image.digest)
+            return image
+
+    def _download(self, url: str, key: str) -> str:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        deadline = time.monotonic() + self.timeout
+
+        for _ in range(MAX_REDIRECTS + 1):
+            parts = urllib.parse.urlsplit(url)
+            scheme = parts.scheme.lower()
+            if scheme not in ('http', 'https') or not parts.hostname:
+                raise ArtworkFetchError(f"Unsupported URL: {url}")
+            port = parts.port or (443 if scheme == 'https' else 80)
+            path = parts.path or '/'
+            if parts.query:
+                path += '?' + parts.query
+
+            conn, response = self._request(scheme, parts.hostname, port, path)
+
+            if response.status in (301, 302, 303, 307, 308):
+                location = response.getheader('Location')
+                response.read()
+                self._finish(conn, response, scheme, parts.hostname, port)
+                if not location:
+                    raise ArtworkFetchError(f"Redirect without Location header ({response.status})")
+                url = urllib.parse.urljoin(url, location)
+                continue
+
+            if response.status != 200:
+                conn.close()
+                raise ArtworkFetchError(f"HTTP {response.status} {response.reason}")
+
+            length = response.getheader('Content-Length')
+            if length and length.isdigit() and int(length) > self.max_bytes:
+                conn.close()
+                raise ArtworkFetchError(f"Image is too large ({int(length)} bytes)")
+
+            try:
+                final_path = self._stream_to_file(response, key, deadline)
+            except Exception:
+                conn.close()
+                raise
+            self._finish(conn, response, scheme, parts.hostname, port)
+            return final_path
+
+        raise ArtworkFetchError("Too many redirects")
+
+    def _request(self, scheme: str, host: str, port: int, path: str):
+        """
+        Send a GET on a pooled connection. If a reused connection turns out to
+        have been closed by the server while idle, retry once on a new one.
+        """
+        conn = self.pool.acquire(scheme, host, port)
+        while True:
+            # A connection that has been used before already has a socket
+            reused = conn.sock is not None
+            try:
+                conn.request('GET', path, headers={'User-Agent': USER_AGENT, 'Accept': 'image/*', 'Connection': 'keep-alive'})
+                return conn, conn.getresponse()
+            except STALE_CONNECTION_ERRORS as e:
+                conn.close()
+                if not reused:
+                    raise ArtworkFetchError(f"Request failed: {e}") from e
+                conn = self.pool.acquire(scheme, host, port, fresh=True)
+            except Exception as e:
+                conn.close()
+                raise ArtworkFetchError(f"Request failed: {e}") from e
+
+    def _stream_to_file(self, response: http.client.HTTPResponse, key: str, deadline: float) -> str:
+        tmp_path = os.path.join(self.cache_dir, f'{key}.{os.getpid()}.{threading.get_ident()}.part')
+        size = 0
+        header = b''
+        ext = None
+        try:
+            with open(tmp_path, 'wb') as out_file:
+                while True:
+                    if time.monotonic() > deadline:
+                        raise ArtworkFetchError("Timed out while downloading image")
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise ArtworkFetchError(f"Image exceeds {self.max_bytes} bytes")
+                    # Validate magic bytes as soon as we have them, before reading the rest
+                    if ext is None:
+                        header += chunk[:SNIFF_BYTES - len(header)]
+                        if len(header) >= SNIFF_BYTES:
+                            ext = sniff_image_type(header)
+                            if ext is None:
+                                raise InvalidImageError("Response is not a valid image")
+                    out_file.write(chunk)
+
+            if ext is None:
+                ext = sniff_image_type(header)
+                if ext is None:
+                    raise InvalidImageError("Response is not a valid image")
+
+            final_path = os.path.join(self.cache_dir, key + ext + '.download')
+            os.replace(tmp_path, final_path)
+            return final_path
+        finally:
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _finish(self, conn, response, scheme: str, host: str, port: int) -> None:
+        """Return the connection to the pool if the server allows keep-alive."""
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.release(scheme, host, port, conn)
+
+
+_default_fetcher: Optional[ArtworkFetcher] = None
+_default_fetcher_lock = threading.Lock()
+
+
+def get_artwork_fetcher() -> ArtworkFetcher:
+    """Return the process-wide fetcher so connections and cache are shared across jobs."""
+    global _default_fetcher
+    with _default_fetcher_lock:
+        if _default_fetcher is None:
+            _default_fetcher = ArtworkFetcher()
+        return _default_fetcher
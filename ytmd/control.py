@@ -0,0 +1,191 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Set
+
+from yt_dlp.postprocessor.common import PostProcessor
+from yt_dlp.utils import DownloadCancelled
+
+POLL_SECONDS = 0.2
+
+
+class JobCancelled(DownloadCancelled):
+    """Raised at the next checkpoint after a job is cancelled; yt-dlp re-raises it even with ignoreerrors."""
+    msg = 'Download cancelled by user'
+
+
+class TrackSkipped(Exception):
+    """Raised for a single track; with ignoreerrors yt-dlp reports it and moves on to the next entry."""
+
+
+def _track_index(info: Dict[str, Any]) -> int:
+    # Same key the TUI rows and update_tags_func use
+    return int(info.get('playlist_index') or 1)
+
+
+class JobControl:
+    """
+    Cooperative cancel, pause/resume and per-track skip for one download job.
+    Nothing is interrupted from outside: the download checks in at every
+    progress callback (each received chunk), before each entry starts
+    (match_filter) and between post-processing and tagging, so a pause stops
+    reading from the network right away and a cancel leaves only whole,
+    tagged tracks behind. Partial files stay in the job's staging directory,
+    which is removed when the job ends.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._running = threading.Event()
+        self._running.set()
+        self._lock = threading.Lock()
+        self._skipped: Set[int] = set()
+        self.current: Optional[int] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        # Wake a paused job so it can stop
+        self._running.set()
+
+    def pause(self) -> None:
+        if not self.cancelled:
+            self._running.clear()
+
+    def resume(self) -> None:
+        self._running.set()
+
+    def toggle_pause(self) -> bool:
+        """Pause or resume; returns True if the job is now paused."""
+        if self.paused:
+            self.resume()
+        else:
+            self.pause()
+        return self.paused
+
+    def skip(self, index: int) -> None:
+        with self._lock:
+            self._skipped.add(int(index))
+
+    def unskip(self, index: int) -> None:
+        with self._lock:
+            self._skipped.discard(int(index))
+
+    def is_skipped(self, index: int) -> bool:
+        with self._lock:
+            return int(index) in self._skipped
+
+    def skip_current(self) -> Optional[int]:
+        """Skip the track being downloaded or processed right now."""
+        current = self.current
+        if current is not None:
+            self.skip(current)
+        return current
+
+    def wait(self) -> None:
+        """Block while paused, then raise JobCancelled if the job was cancelled."""
+        while not self._running.wait(POLL_SECONDS):
+            pass
+        if self.cancelled:
+            raise JobCancelled()
+
+    def checkpoint(self, info: Dict[str, Any]) -> None:
+        self.wait()
+        if self.is_skipped(_track_index(info)):
+            raise TrackSkipped(f"Skipped by user: {info.get('title') or _track_index(info)}")
+
+    def match_filter(self, info: Dict[str, Any], incomplete: bool = False) -> Optional[str]:
+        """yt-dlp match_filter: holds the next entry while paused and drops skipped entries without an error."""
+        self.wait()
+        index = _track_index(info)
+        if self.is_skipped(index):
+            return 'Skipped by user'
+        if not incomplete:
+            self.current = index
+        return None
+
+    def progress_hook(self, d: Dict[str, Any]) -> None:
+        if d.get('status') != 'downloading':
+            return
+        info = d.get('info_dict') or {}
+        self.current = _track_index(info)
+        try:
+            self.checkpoint(info)
+        except TrackSkipped:
+            # Drop the partial download now instead of waiting for the staging cleanup
+            tmp_path = d.get('tmpfilename')
+            if tmp_path:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+            raise
+
+    def install_signal_handlers(self, print_func: Callable[[str], None]) -> Callable[[], None]:
+        """
+        CLI handlers: Ctrl-C (and SIGTERM) cancel cooperatively, a second Ctrl-C
+        quits immediately, and SIGUSR1 toggles pause. Returns a function that
+        restores the previous handlers.
+        """
+        import signal
+
+        def on_interrupt(signum, frame):
+            if self.cancelled:
+                raise KeyboardInterrupt
+            print_func("\n[bold yellow]Cancelling after the current step... (Ctrl-C again to quit now)[/bold yellow]")
+            self.cancel()
+
+        def on_toggle_pause(signum, frame):
+            if self.toggle_pause():
+                print_func("[bold yellow]Paused (send SIGUSR1 again to resume)[/bold yellow]")
+            else:
+                print_func("[bold cyan]Resumed[/bold cyan]")
+
+        handlers = {signal.SIGINT: on_interrupt, signal.SIGTERM: on_interrupt}
+        if hasattr(signal, 'SIGUSR1'):
+            handlers[signal.SIGUSR1] = on_toggle_pause
+
+        previous = {}
+        for signum, handler in handlers.items():
+            try:
+                previous[signum] = signal.signal(signum, handler)
+            except ValueError:
+                # Not in the main thread
+                pass
+
+        def restore():
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+        return restore
+
+
+class JobControlPostProcessor(PostProcessor):
+    """
+    Checkpoint between audio extraction and tagging. A skipped track's
+    converted file is removed so it is never published.
+    """
+
+    def __init__(self, downloader=None, control: JobControl = None):
+        super().__init__(downloader)
+        self.control = control
+
+    def run(self, info):
+        self.control.current = _track_index(info)
+        try:
+            self.control.checkpoint(info)
+        except TrackSkipped:
+            paths = [info.get('filepath')] + [t.get('filepath') for t in info.get('thumbnails') or []]
+            for path in paths:
+                if path and os.path.exists(path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+            raise
+        return [], info
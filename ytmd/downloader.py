@@ -1,36 +1,59 @@
 import yt_dlp
 from yt_dlp.postprocessor.common import PostProcessor
 from typing import Dict, Any
+from ytmd.models import MediaInfo
+from ytmd.output import DOWNLOAD_ROOT, OutputWriter, InsufficientSpaceError
+from ytmd.titles import TitleNormalizer, TRACK_PREFIX_RE
+from ytmd.utils import sanitize_filename
 import os
-import re
 
 class ID3TagPostProcessor(PostProcessor):
-    def __init__(self, downloader=None, collector: Dict[str, Any] = None, print_func=None, update_tags_func=None, use_playlist_thumb=False, manual_meta: Dict[str, str] = None, custom_image_path: str = None):
+    def __init__(self, downloader=None, collector: Dict[str, Any] = None, print_func=None, update_tags_func=None, use_playlist_thumb=False, manual_meta: Dict[str, str] = None, cover_image=None, output_writer: OutputWriter = None, loudness=None, duplicates=None, enricher=None, manifest=None, album_gain=True, skip_func=None):
         super().__init__(downloader)
         self.collector = collector
         self.print_func = print_func or __import__('rich').print
         self.update_tags_func = update_tags_func
         self.use_playlist_thumb = use_playlist_thumb
         self.manual_meta = manual_meta or {}
-        self.custom_image_path = custom_image_path
+        self.cover_image = cover_image
+        self.output_writer = output_writer
+        self.loudness = loudness
+        self.album_gain = album_gain
+        self.duplicates = duplicates
+        self.enricher = enricher
+        self.manifest = manifest
+        self.skip_func = skip_func
+        self._pending = []
+        self._playlist_thumb = None
 
     def run(self, info):
         filepath = info.get('filepath')
         if filepath and filepath.endswith('.mp3'):
-            from mutagen.easyid3 import EasyID3
-            from mutagen.id3 import ID3, APIC, ID3NoHeaderError
-            
             # 1. Metadata Extraction (Title, Artist, Album, Year, Track)
             title = info.get('title')
             
             # Manual metadata overrides info dict if provided
             artist = self.manual_meta.get('artist') or info.get('artist')
-            album = self.manual_meta.get('album') or info.get('album') or info.get('playlist_title')
+            album = self.manual_meta.get('album') or info.get('album')
             
             track_number = info.get('playlist_index') or info.get('track_number')
             
-            # Year logic: manual first, then release_year, then fallback to upload_date (YYYYMMDD)
+            # Year logic: manual first, then release_year, then enrichment, then fallback to upload_date (YYYYMMDD)
             year = self.manual_meta.get('year') or info.get('release_year')
+
+            # Fill gaps from the local enrichment cache before falling back to guesses
+            if self.enricher is not None:
+                video_id = info.get('id')
+                self.enricher.record(video_id, title, {'artist': artist, 'album': album, 'year': year})
+                if not (artist and album and year):
+                    known = self.enricher.lookup(video_id, title, artist)
+                    artist = artist or known.get('artist')
+                    album = album or known.get('album')
+                    year = year or known.get('year')
+
+            # Artist split out of an "Artist - Title" video title is the last resort
+            artist = artist or info.get('__ytmd_title_artist')
+            album = album or info.get('__ytmd_album_fallback') or info.get('playlist_title')
             if not year and info.get('upload_date'):
                 upload_date = str(info.get('upload_date'))
                 if len(upload_date) >= 4:
@@ -40,77 +63,31 @@ class ID3TagPostProcessor(PostProcessor):
             if not title:
                 filename = os.path.basename(filepath)
                 basename = os.path.splitext(filename)[0]
-                title = re.sub(r'^\d+\s*-\s*', '', basename)
+                title = TRACK_PREFIX_RE.sub('', basename)
             
-            try:
-                audio = EasyID3(filepath)
-            except ID3NoHeaderError:
-                import mutagen
-                audio = mutagen.File(filepath, easy=True)
-                audio.add_tags()
-                audio = EasyID3(filepath)
-            except Exception as e:
-                self.print_func(f"[bold red]Failed to read ID3 tags from {filepath}: {e}[/bold red]")
+            # Flag or skip likely duplicates of tracks already in the library, before tagging
+            if self.duplicates is not None and self.duplicates.enabled:
+                if self._check_duplicate(filepath, title):
+                    if self.skip_func:
+                        self.skip_func(info)
+                    return [], info
+
+            tags = {
+                'title': title,
+                'artist': artist,
+                'album': album,
+                'year': str(year) if year else None,
+                'track': str(track_number) if track_number else None,
+                # Cover carried over from the source when a long mix is split
+                'cover': info.get('__ytmd_cover'),
+            }
+
+            # With loudness analysis enabled the tag commit waits for the analysis,
+            # which runs in the background while the next track downloads
+            if self.loudness is not None:
+                self._pending.append((filepath, tags, info, self.loudness.submit(filepath)))
+            elif not self._commit(filepath, tags, info):
                 return [], info
-            
-            # Apply Tags
-            audio['title'] = title
-            if artist:
-                audio['artist'] = artist
-            if album:
-                audio['album'] = album
-            if year:
-                audio['date'] = str(year)
-            if track_number:
-                audio['tracknumber'] = str(track_number)
-                
-            audio.save()
-            
-            # 2. Album Art Logic (Playlist Cover Override)
-            custom_thumb_applied = False
-            if self.custom_image_path and os.path.exists(self.custom_image_path) and os.path.isfile(self.custom_image_path):
-                try:
-                    audio_id3 = ID3(filepath)
-                    audio_id3.delall('APIC') # Remove existing track thumbnail
-                    with open(self.custom_image_path, 'rb') as img_file:
-                        mime = 'image/jpeg' if self.custom_image_path.lower().endswith(('.jpg', '.jpeg')) else 'image/png'
-                        audio_id3.add(APIC(
-                            encoding=3,
-                            mime=mime,
-                            type=3,
-                            desc=u'Cover',
-                            data=img_file.read()
-                        ))
-                    audio_id3.save(v2_version=3)
-                    custom_thumb_applied = True
-                except Exception as e:
-                    self.print_func(f"[dim red]Failed to apply custom cover to {filepath}: {e}[/dim red]")
-
-            if self.use_playlist_thumb and not custom_thumb_applied:
-                parent_dir = os.path.dirname(filepath)
-                playlist_thumb = None
-                # Look for "0 - ..." image files in the same directory
-                for f in os.listdir(parent_dir):
-                    if f.startswith('0 - ') and f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
-                        playlist_thumb = os.path.join(parent_dir, f)
-                        break
-                
-                if playlist_thumb:
-                    try:
-                        audio_id3 = ID3(filepath)
-                        audio_id3.delall('APIC') # Remove existing track thumbnail
-                        with open(playlist_thumb, 'rb') as img_file:
-                            mime = 'image/jpeg' if playlist_thumb.lower().endswith(('.jpg', '.jpeg')) else 'image/png'
-                            audio_id3.add(APIC(
-                                encoding=3,
-                                mime=mime,
-                                type=3,
-                                desc=u'Cover',
-                                data=img_file.read()
-                            ))
-                        audio_id3.save(v2_version=3)
-                    except Exception as e:
-                        self.print_func(f"[dim red]Failed to apply playlist cover to {filepath}: {e}[/dim red]")
 
             # Applied tags summary for TUI
             tags_dict = {
@@ -122,7 +99,8 @@ class ID3TagPostProcessor(PostProcessor):
             }
             
             if self.update_tags_func:
-                idx = str(track_number) if track_number else "1"
+                # Split pieces report against the row of the video they came from
+                idx = str(info.get('__ytmd_split_from') or track_number or "1")
                 self.update_tags_func(idx, tags_dict)
             
             # Collect for xattr (if collector provided)
@@ -137,9 +115,221 @@ class ID3TagPostProcessor(PostProcessor):
 
         return [], info
 
-def fetch_info(url: str) -> Dict[str, Any]:
+    def _commit(self, filepath: str, tags: Dict[str, Any], info: Dict[str, Any] = None, replaygain: Dict[str, str] = None) -> bool:
+        """
+        Write all frames (text tags, cover art, ReplayGain) in a single ID3 save,
+        then publish the file out of the staging directory.
+        """
+        from mutagen.id3 import ID3, APIC, TIT2, TPE1, TALB, TDRC, TRCK, TXXX, ID3NoHeaderError
+
+        try:
+            audio = ID3(filepath)
+        except ID3NoHeaderError:
+            audio = ID3()
+        except Exception as e:
+            self.print_func(f"[bold red]Failed to read ID3 tags from {filepath}: {e}[/bold red]")
+            return False
+
+        # Apply Tags
+        audio.setall('TIT2', [TIT2(encoding=3, text=tags['title'])])
+        if tags['artist']:
+            audio.setall('TPE1', [TPE1(encoding=3, text=tags['artist'])])
+        if tags['album']:
+            audio.setall('TALB', [TALB(encoding=3, text=tags['album'])])
+        if tags['year']:
+            audio.setall('TDRC', [TDRC(encoding=3, text=tags['year'])])
+        if tags['track']:
+            audio.setall('TRCK', [TRCK(encoding=3, text=tags['track'])])
+
+        # Album Art Logic (Playlist Cover Override)
+        # Cover bytes come from the shared image store, so each distinct image is read once
+        cover = self.cover_image
+        if cover is None and self.use_playlist_thumb:
+            cover = self._find_playlist_thumb(os.path.dirname(filepath))
+        if cover is None:
+            cover = tags.get('cover')
+
+        if cover is not None:
+            from ytmd.image_store import get_image_store
+            try:
+                audio.setall('APIC', [APIC(
+                    encoding=3,
+                    mime=cover.mime,
+                    type=3,
+                    desc=u'Cover',
+                    data=get_image_store().read(cover)
+                )]) # Replaces the existing track thumbnail
+            except Exception as e:
+                self.print_func(f"[dim red]Failed to apply cover to {filepath}: {e}[/dim red]")
+
+        for key, value in (replaygain or {}).items():
+            audio.setall(f'TXXX:{key}', [TXXX(encoding=3, desc=key, text=value)])
+
+        try:
+            audio.save(filepath, v2_version=3)
+        except Exception as e:
+            self.print_func(f"[bold red]Failed to write ID3 tags to {filepath}: {e}[/bold red]")
+            return False
+
+        # Manifest fields are read while the staged file is still at hand
+        if self.manifest is not None:
+            # Hash the bytes actually embedded: store digests are of the source
+            # image, which differs from the embedded JPEG when it was converted
+            cover_digest = None
+            if audio.getall('APIC'):
+                import hashlib
+                cover_digest = hashlib.sha256(audio.getall('APIC')[0].data).hexdigest()
+            duration = (info or {}).get('duration')
+            try:
+                from mutagen.mp3 import MP3
+                duration = MP3(filepath).info.length
+            except Exception:
+                pass
+
+        # Publish the fully tagged file out of the staging directory
+        published = filepath
+        if self.output_writer is not None and self.output_writer.is_staged(filepath):
+            try:
+                published = self.output_writer.publish(filepath)
+                if info is not None:
+                    info['filepath'] = published
+            except Exception as e:
+                self.print_func(f"[bold red]Failed to publish {filepath}: {e}[/bold red]")
+                return True
+
+        if self.manifest is not None:
+            try:
+                self.manifest.add(published, tags, duration=duration, cover_digest=cover_digest, replaygain=replaygain)
+            except Exception as e:
+                self.print_func(f"[dim red]Failed to update playlist manifest: {e}[/dim red]")
+        return True
+
+    def finish(self) -> None:
+        """
+        Commit tags for tracks held back for loudness analysis. Album gain is
+        derived from the per-track results, so no file is decoded twice; it is
+        left out when `album_gain` is off (the batch is not the whole album).
+        """
+        if not self._pending:
+            return
+        from ytmd.loudness import album_loudness, replaygain_tags
+
+        results = []
+        for filepath, tags, info, future in self._pending:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                self.print_func(f"[dim red]Loudness analysis failed for {filepath}: {e}[/dim red]")
+                results.append(None)
+
+        album = album_loudness([r for r in results if r is not None]) if self.album_gain else None
+        for (filepath, tags, info, _), result in zip(self._pending, results):
+            self._commit(filepath, tags, info, replaygain=replaygain_tags(result, album) if result else None)
+        self._pending = []
+
+    def _check_duplicate(self, filepath: str, title: str) -> bool:
+        """Return True if the track was dropped as a duplicate."""
+        from ytmd.fingerprint import FingerprintUnavailable
+        final_path = filepath
+        if self.output_writer is not None and self.output_writer.is_staged(filepath):
+            final_path = self.output_writer.final_path(filepath)
+        try:
+            match = self.duplicates.check(filepath, final_path)
+        except FingerprintUnavailable as e:
+            self.print_func(f"[yellow]Duplicate detection disabled: {e}[/yellow]")
+            self.duplicates.enabled = False
+            return False
+        except Exception as e:
+            self.print_func(f"[dim red]Fingerprinting failed for {filepath}: {e}[/dim red]")
+            return False
+
+        if not match:
+            return False
+        match_path, similarity = match
+        self.print_func(f"[yellow]Possible duplicate: {title} ≈ {match_path} ({similarity:.0%} similar)[/yellow]")
+        if self.duplicates.mode == 'skip':
+            try:
+                os.remove(filepath)
+            except OSError:
+                pass
+            self.print_func(f"[yellow]  -> Skipped {os.path.basename(filepath)}[/yellow]")
+            return True
+        return False
+
+    def _find_playlist_thumb(self, parent_dir: str):
+        """Locate the playlist "0 - ..." thumbnail once and ingest it into the image store."""
+        if self._playlist_thumb is not None:
+            return self._playlist_thumb
+        from ytmd.image_store import get_image_store
+        # Look for "0 - ..." image files in the same directory
+        for f in os.listdir(parent_dir):
+            if f.startswith('0 - ') and f.lower().endswith(('.jpg', '.jpeg', '.png', '.webp')):
+                try:
+                    self._playlist_thumb = get_image_store().add_file(os.path.join(parent_dir, f))
+                except Exception as e:
+                    self.print_func(f"[dim red]Failed to load playlist cover {f}: {e}[/dim red]")
+                break
+        return self._playlist_thumb
+
+class TitleCleanupPostProcessor(PostProcessor):
+    """
+    Runs before yt-dlp builds output filenames, so the cleaned title is used
+    for both the filename and the ID3 title. An artist split out of the title
+    is kept aside and only used when no better source has one.
+    """
+    def __init__(self, downloader=None, normalizer: TitleNormalizer = None, entries=None):
+        super().__init__(downloader)
+        self.normalizer = normalizer or TitleNormalizer()
+        # Playlist entries are normalized up front in one batch, keyed by video ID
+        self._batch = {}
+        if entries:
+            entries = [e for e in entries if e.id and e.title]
+            results = self.normalizer.normalize_batch((e.title for e in entries), (e.artist for e in entries))
+            self._batch = {e.id: (e.title, result) for e, result in zip(entries, results)}
+
+    def run(self, info):
+        if info.get('title'):
+            cached = self._batch.get(info.get('id'))
+            if cached and cached[0] == info['title'] and not info.get('artist'):
+                artist, title = cached[1]
+            else:
+                artist, title = self.normalizer.normalize(info['title'], info.get('artist'))
+            if title:
+                info['title'] = title
+            if artist and not info.get('artist'):
+                info['__ytmd_title_artist'] = artist
+        return [], info
+
+class PlaylistPositionPostProcessor(PostProcessor):
+    """
+    For playlist entries downloaded from their own watch URLs: sets the
+    playlist fields yt-dlp would have filled in, from the stored entry
+    positions, so filenames, track numbers and the album fallback come out
+    the same as in a playlist download.
+    """
+    def __init__(self, downloader=None, info: MediaInfo = None):
+        super().__init__(downloader)
+        self.info = info
+        self.positions = {e.id: e.index for e in info.valid_entries() if e.id}
+
+    def apply(self, info):
+        index = self.positions.get(info.get('id'))
+        if index is not None:
+            info['playlist_index'] = index
+            info.setdefault('playlist_title', self.info.title)
+            info.setdefault('playlist_id', self.info.id)
+        return info
+
+    def run(self, info):
+        return [], self.apply(info)
+
+def watch_url(video_id: str) -> str:
+    return f'https://www.youtube.com/watch?v={video_id}'
+
+def fetch_info(url: str) -> MediaInfo:
     """
     Fetch metadata for a given URL without downloading the content.
+    The raw yt-dlp dict is parsed into a slim MediaInfo and released immediately.
     """
     ydl_opts = {
         'extract_flat': True,
@@ -149,7 +339,7 @@ def fetch_info(url: str) -> Dict[str, Any]:
     }
     with yt_dlp.YoutubeDL(ydl_opts) as ydl:
         info_dict = ydl.extract_info(url, download=False)
-        return info_dict or {}
+        return MediaInfo.from_info_dict(info_dict or {})
 
 def get_base_ydl_opts() -> Dict[str, Any]:
     """
@@ -176,9 +366,167 @@ def get_base_ydl_opts() -> Dict[str, Any]:
         'updatetime': False,
     }
 
-def download_media(url: str, info_dict: Dict[str, Any], progress_manager=None, print_func=None, update_tags_func=None, use_playlist_thumb=False, manual_meta: Dict[str, str] = None, custom_image_path: str = None) -> None:
+def get_playlist_dir(info: MediaInfo) -> str:
+    """
+    Return the download directory used for a playlist.
+    """
+    playlist_title = info.title or 'Unknown'
+    # Strip "Album - " prefix if present (common in YouTube Music albums)
+    if isinstance(playlist_title, str) and playlist_title.startswith('Album - '):
+        playlist_title = playlist_title[len('Album - '):]
+    return os.path.join(DOWNLOAD_ROOT, sanitize_filename(playlist_title) or 'Unknown')
+
+def finalize_playlist_dir(root_dir: str, collector: Dict[str, Any], manual_meta: Dict[str, str] = None, cover_image=None, print_func=None) -> None:
+    """
+    Playlist-level outputs written once all tracks are in place: the folder
+    cover (as a hardlink into the image store) and the representative
+    artist/year directory xattrs.
+    """
+    if print_func is None:
+        from rich import print as rich_print
+        print_func = rich_print
+    if not os.path.isdir(root_dir):
+        return
+
+    import subprocess
+    import glob
+    from ytmd.image_store import get_image_store
+    image_store = get_image_store()
+
+    existing_covers = []
+    for ext in ('*.jpg', '*.jpeg', '*.png', '*.webp'):
+        existing_covers.extend(glob.glob(os.path.join(glob.escape(root_dir), f'0 - {ext}')))
+
+    if cover_image is not None:
+        for file in existing_covers:
+            try:
+                os.remove(file)
+            except Exception:
+                pass
+        dest_path = os.path.join(root_dir, f'0 - cover{cover_image.ext}')
+        try:
+            image_store.link_into(cover_image, dest_path)
+            if print_func:
+                print_func(f"[bold cyan]  -> 플레이리스트 커버 이미지를 커스텀 이미지로 교체했습니다.[/bold cyan]")
+        except Exception as e:
+            if print_func:
+                print_func(f"[red]Failed to copy custom cover image: {e}[/red]")
+    else:
+        # Replace the downloaded playlist thumbnail with a hardlink into the shared store
+        for file in existing_covers:
+            try:
+                stored = image_store.add_file(file)
+                os.remove(file)
+                image_store.link_into(stored, os.path.splitext(file)[0] + stored.ext)
+            except Exception:
+                pass
+
+    final_artist = None
+    if manual_meta and manual_meta.get('artist'):
+        final_artist = manual_meta['artist']
+    elif collector['artists']:
+        # Use the most frequent artist as representative
+        from collections import Counter
+        final_artist = Counter(collector['artists']).most_common(1)[0][0]
+
+    final_year = None
+    if manual_meta and manual_meta.get('year'):
+        final_year = manual_meta['year']
+    elif collector['years']:
+        final_year = str(min(collector['years']))
+
+    try:
+        if final_artist:
+            subprocess.run(['xattr', '-w', 'user.artist', final_artist, root_dir], stderr=subprocess.DEVNULL, check=True)
+        if final_year:
+            subprocess.run(['xattr', '-w', 'user.year', final_year, root_dir], stderr=subprocess.DEVNULL, check=True)
+
+        if final_artist or final_year:
+            print_func(f"[bold cyan]  -> 디렉터리 메타데이터 업데이트: Artist='{final_artist}', Year='{final_year}'[/bold cyan]")
+    except Exception:
+        # xattr is not available or not supported on this filesystem
+        pass
+
+def resolve_custom_image(custom_image_path: str, print_func=None):
     """
-    Download the media using the fetched info dictionary.
+    Load a custom cover (image URL, local path or dragged Windows path under
+    WSL) into the image store. Returns the StoredImage, or None on failure.
+    """
+    if not custom_image_path:
+        return None
+    from ytmd.image_store import get_image_store
+
+    cover_image = None
+    local_custom_image_path = None
+    custom_image_path = custom_image_path.strip().strip("'").strip('"')
+    if custom_image_path.startswith('file://'):
+        custom_image_path = custom_image_path[7:]
+        
+    if custom_image_path.startswith('http://') or custom_image_path.startswith('https://'):
+        from ytmd.artwork import get_artwork_fetcher, InvalidImageError
+        try:
+            cover_image = get_artwork_fetcher().fetch(custom_image_path)
+        except InvalidImageError:
+            if print_func: print_func(f"[bold red]오류: 입력한 URL은 유효한 이미지 파일이 아닙니다. (웹페이지 URL 대신 이미지 주소 복사를 사용해주세요)[/bold red]")
+        except Exception as e:
+            if print_func: print_func(f"[red]커스텀 이미지 다운로드 실패: {e}[/red]")
+    else:
+        local_custom_image_path = custom_image_path.replace('\\ ', ' ')
+        
+        # WSL Path Conversion for Windows dragged paths
+        is_wsl = False
+        try:
+            with open('/proc/version', 'r') as f:
+                if 'microsoft' in f.read().lower():
+                    is_wsl = True
+        except:
+            pass
+        
+        import platform
+        if is_wsl or 'microsoft' in platform.uname().release.lower():
+            import re
+            wsl_win_path = local_custom_image_path
+            if re.match(r'^/[a-zA-Z]:/', wsl_win_path):
+                wsl_win_path = wsl_win_path[1:]
+            
+            if re.match(r'^[a-zA-Z]:[/\\]', wsl_win_path):
+                import subprocess
+                win_path = wsl_win_path.replace('/', '\\')
+                try:
+                    result = subprocess.run(['wslpath', '-u', win_path], capture_output=True, text=True, check=True)
+                    local_custom_image_path = result.stdout.strip()
+                except Exception:
+                    pass
+
+        if not os.path.exists(local_custom_image_path) and os.path.exists(custom_image_path):
+            local_custom_image_path = custom_image_path
+
+        if os.path.isfile(local_custom_image_path):
+            try:
+                cover_image = get_image_store().add_file(local_custom_image_path)
+            except Exception as e:
+                if print_func: print_func(f"[red]커스텀 이미지를 불러오지 못했습니다: {e}[/red]")
+    return cover_image
+
+def download_media(url: str, info: MediaInfo, progress_manager=None, print_func=None, update_tags_func=None, use_playlist_thumb=False, manual_meta: Dict[str, str] = None, custom_image_path: str = None, playlist_items: str = None, replaygain: bool = False, split_chapters: bool = False, dedupe: str = None, metadata_map: str = None, title_rules: str = None, raw_titles: bool = False, manifest=None, playlist_outputs: bool = True, control=None, album_gain: bool = True, skip_func=None, by_id: bool = False) -> None:
+    """
+    Download the media described by the fetched MediaInfo.
+    `playlist_items` (e.g. "3,7,12") restricts a playlist download to those indices.
+    `by_id` downloads the entries of `info` from their own watch URLs instead of
+    listing the playlist again, so each gets exactly the video it was queued
+    for, keeping its stored position for the filename and track number.
+    `replaygain` enables EBU R128 analysis and ReplayGain track/album tags;
+    `album_gain` off writes track gain only (for downloads of part of an album).
+    `split_chapters` splits long uploads into per-track files by chapters (or silence).
+    `dedupe` ('flag' or 'skip') checks each track against the library fingerprint index.
+    `metadata_map` is an optional JSON/CSV file used to fill missing artist/album/year.
+    `title_rules` is an optional JSON rules file for title cleanup; `raw_titles` disables it.
+    `manifest` receives each published track (defaults to the playlist's M3U8/JSON manifest).
+    With `playlist_outputs` off the folder cover and xattrs are left to the caller
+    (batch workers aggregate them once all shards are done).
+    `control` is a JobControl for cancel, pause/resume and per-track skip.
+    `skip_func(info)` is called for each track dropped as a duplicate, so callers
+    can settle it instead of retrying it.
     """
     if print_func is None:
         from rich import print as rich_print
@@ -186,174 +534,147 @@ def download_media(url: str, info_dict: Dict[str, Any], progress_manager=None, p
         
     if progress_manager is None:
         from ytmd.ui import DownloadProgressManager
-        progress_manager = DownloadProgressManager(info_dict)
+        progress_manager = DownloadProgressManager(info)
     
     ydl_opts = get_base_ydl_opts()
     
     # Set outtmpl dynamically
-    if 'entries' in info_dict:
-        # Create a folder named after the playlist
-        # Strip "Album - " prefix if present (common in YouTube Music albums)
-        playlist_title = info_dict.get('title', '%(playlist_title)s')
-        if isinstance(playlist_title, str) and playlist_title.startswith('Album - '):
-            clean_title = playlist_title[len('Album - '):]
-            ydl_opts['outtmpl'] = f'download/{clean_title}/%(playlist_index)s - %(title)s.%(ext)s'
+    if info.is_playlist:
+        # Create a folder named after the playlist, matching get_playlist_dir
+        if info.title:
+            folder = os.path.basename(get_playlist_dir(info)).replace('%', '%%')
+            outtmpl = f'{folder}/%(playlist_index)s - %(title)s.%(ext)s'
         else:
-            ydl_opts['outtmpl'] = 'download/%(playlist_title)s/%(playlist_index)s - %(title)s.%(ext)s'
+            outtmpl = '%(playlist_title)s/%(playlist_index)s - %(title)s.%(ext)s'
     else:
-        ydl_opts['outtmpl'] = 'download/%(title)s.%(ext)s'
+        outtmpl = '%(title)s.%(ext)s'
     
-    # We will pass progress hooks
-    ydl_opts['progress_hooks'] = [progress_manager.yt_dlp_hook]
+    from ytmd.control import JobControl, JobControlPostProcessor, JobCancelled
+    if control is None:
+        control = JobControl()
+
+    # We will pass progress hooks; the control hook runs first so a pause takes effect on the next chunk
+    ydl_opts['progress_hooks'] = [control.progress_hook, progress_manager.yt_dlp_hook]
+    # Holds entries while paused and drops skipped ones before they are downloaded
+    ydl_opts['match_filter'] = control.match_filter
+
+    targets = [url]
+    positions = None
+    if by_id and info.is_playlist:
+        targets = [watch_url(e.id) for e in info.valid_entries() if e.id]
+        positions = PlaylistPositionPostProcessor(info=info)
+        # Positions are needed before filtering, so skips and the TUI rows see the right index
+        ydl_opts['match_filter'] = lambda entry, incomplete=False: control.match_filter(positions.apply(entry), incomplete)
+    elif playlist_items:
+        ydl_opts['playlist_items'] = playlist_items
     
     # Collector for playlist-level metadata (xattr)
     collector = {'artists': [], 'years': []}
     
-    local_custom_image_path = None
-    is_temp_image = False
-    if custom_image_path:
-        custom_image_path = custom_image_path.strip().strip("'").strip('"')
-        if custom_image_path.startswith('file://'):
-            custom_image_path = custom_image_path[7:]
-            
-        if custom_image_path.startswith('http://') or custom_image_path.startswith('https://'):
-            import urllib.request
-            import tempfile
-            try:
-                ext = '.jpg'
-                if '.png' in custom_image_path.lower(): ext = '.png'
-                elif '.webp' in custom_image_path.lower(): ext = '.webp'
-                
-                fd, temp_path = tempfile.mkstemp(suffix=ext)
-                os.close(fd)
-                
-                req = urllib.request.Request(custom_image_path, headers={'User-Agent': 'Mozilla/5.0'})
-                with urllib.request.urlopen(req) as response, open(temp_path, 'wb') as out_file:
-                    out_file.write(response.read())
-                    
-                def is_valid_image(filepath):
-                    with open(filepath, 'rb') as f:
-                        header = f.read(12)
-                    if header.startswith(b'\xff\xd8\xff'): return True # JPEG
-                    if header.startswith(b'\x89PNG\r\n\x1a\n'): return True # PNG
-                    if header.startswith(b'GIF8'): return True # GIF
-                    if header.startswith(b'RIFF') and len(header) >= 12 and header[8:12] == b'WEBP': return True # WebP
-                    return False
-                
-                if not is_valid_image(temp_path):
-                    if print_func: print_func(f"[bold red]오류: 입력한 URL은 유효한 이미지 파일이 아닙니다. (웹페이지 URL 대신 이미지 주소 복사를 사용해주세요)[/bold red]")
-                    try:
-                        os.remove(temp_path)
-                    except:
-                        pass
-                else:
-                    local_custom_image_path = temp_path
-                    is_temp_image = True
-            except Exception as e:
-                if print_func: print_func(f"[red]커스텀 이미지 다운로드 실패: {e}[/red]")
-        else:
-            local_custom_image_path = custom_image_path.replace('\\ ', ' ')
-            
-            # WSL Path Conversion for Windows dragged paths
-            is_wsl = False
-            try:
-                with open('/proc/version', 'r') as f:
-                    if 'microsoft' in f.read().lower():
-                        is_wsl = True
-            except:
-                pass
-            
-            import platform
-            if is_wsl or 'microsoft' in platform.uname().release.lower():
-                import re
-                wsl_win_path = local_custom_image_path
-                if re.match(r'^/[a-zA-Z]:/', wsl_win_path):
-                    wsl_win_path = wsl_win_path[1:]
-                
-                if re.match(r'^[a-zA-Z]:[/\\]', wsl_win_path):
-                    import subprocess
-                    win_path = wsl_win_path.replace('/', '\\')
-                    try:
-                        result = subprocess.run(['wslpath', '-u', win_path], capture_output=True, text=True, check=True)
-                        local_custom_image_path = result.stdout.strip()
-                    except Exception:
-                        pass
+    cover_image = resolve_custom_image(custom_image_path, print_func)
+
+    # Work happens in a staging directory; finished tracks are published atomically
+    writer = OutputWriter()
+    durations = [e.duration for e in info.valid_entries()]
+    missing_durations = sum(1 for d in durations if not d)
+    try:
+        # ReplayGain holds every track in staging until the album gain is known
+        writer.check_free_space(info.total_duration, missing_durations,
+                                largest_seconds=max((d for d in durations if d), default=0), deferred=replaygain)
+    except InsufficientSpaceError as e:
+        print_func(f"[bold red]{e}[/bold red]")
+        return
 
-            if not os.path.exists(local_custom_image_path) and os.path.exists(custom_image_path):
-                local_custom_image_path = custom_image_path
+    loudness = None
+    if replaygain:
+        from ytmd.loudness import LoudnessAnalyzer
+        loudness = LoudnessAnalyzer()
 
+    from ytmd.enrich import get_metadata_enricher
     try:
-        with progress_manager:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.add_post_processor(ID3TagPostProcessor(downloader=ydl, collector=collector, print_func=print_func, update_tags_func=update_tags_func, use_playlist_thumb=use_playlist_thumb, manual_meta=manual_meta, custom_image_path=local_custom_image_path), when='post_process')
-                ydl.download([url])
-                
+        enricher = get_metadata_enricher(metadata_map)
+    except Exception as e:
+        print_func(f"[red]Failed to load metadata mapping {metadata_map}: {e}[/red]")
+        enricher = get_metadata_enricher()
+
+    normalizer = None
+    if not raw_titles:
+        from ytmd.titles import load_title_normalizer
+        try:
+            normalizer = load_title_normalizer(title_rules)
+        except Exception as e:
+            print_func(f"[red]Failed to load title rules {title_rules}: {e}[/red]")
+            normalizer = TitleNormalizer()
+
+    duplicates = None
+    if dedupe:
+        from ytmd.fingerprint import FingerprintIndex, DuplicateDetector
+        duplicates = DuplicateDetector(FingerprintIndex(), mode=dedupe)
+
+    # Playlist folders get an M3U8 and JSON manifest, updated as each track is published
+    if manifest is None and info.is_playlist and playlist_outputs:
+        from ytmd.manifest import PlaylistManifest
+        manifest = PlaylistManifest(get_playlist_dir(info), title=info.title, url=url)
+
+    cancelled = False
+    tagger = None
+    try:
+        with writer:
+            ydl_opts['outtmpl'] = writer.staging_path(outtmpl)
+            try:
+                with progress_manager:
+                    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                        tagger = ID3TagPostProcessor(downloader=ydl, collector=collector, print_func=print_func, update_tags_func=update_tags_func, use_playlist_thumb=use_playlist_thumb, manual_meta=manual_meta, cover_image=cover_image, output_writer=writer, loudness=loudness, duplicates=duplicates, enricher=enricher, manifest=manifest, album_gain=album_gain, skip_func=skip_func)
+                        # Runs after audio extraction, before splitting and tagging
+                        ydl.add_post_processor(JobControlPostProcessor(downloader=ydl, control=control), when='post_process')
+                        if positions is not None:
+                            ydl.add_post_processor(positions, when='pre_process')
+                        if normalizer is not None:
+                            ydl.add_post_processor(TitleCleanupPostProcessor(downloader=ydl, normalizer=normalizer, entries=info.valid_entries()), when='pre_process')
+                        if split_chapters:
+                            from ytmd.splitter import SplitChaptersPostProcessor
+                            ydl.add_post_processor(SplitChaptersPostProcessor(downloader=ydl, tagger=tagger, print_func=print_func, normalizer=normalizer), when='post_process')
+                        else:
+                            ydl.add_post_processor(tagger, when='post_process')
+                        try:
+                            ydl.download(targets)
+                        except JobCancelled:
+                            cancelled = True
+            except KeyboardInterrupt:
+                # A second Ctrl-C quits right away, without waiting for the analysis
+                tagger = None
+                raise
+            finally:
+                if loudness is not None and tagger is not None:
+                    # Tracks analysed before a cancel or an error are still tagged and published
+                    print_func("[cyan]Writing ReplayGain tags...[/cyan]")
+                    tagger.finish()
+                    # On an error the writer is left without finalizing, so sync what was published
+                    writer.flush()
+            if cancelled:
+                # Leaving the writer with an error skips publishing leftovers and removes partial files
+                writer.flush()
+                raise JobCancelled()
+
         # After download, if it was a playlist, cleanup or update xattr
-        if 'entries' in info_dict:
-            # Determine destination directory
-            playlist_title = info_dict.get('title', 'Unknown')
-            if isinstance(playlist_title, str) and playlist_title.startswith('Album - '):
-                playlist_title = playlist_title[len('Album - '):]
-            
-            root_dir = os.path.join('download', playlist_title)
-            
-            if os.path.isdir(root_dir):
-                import subprocess
-                import shutil
-                import glob
-                
-                if local_custom_image_path and os.path.exists(local_custom_image_path):
-                    for ext in ('*.jpg', '*.jpeg', '*.png', '*.webp'):
-                        for file in glob.glob(os.path.join(glob.escape(root_dir), f'0 - {ext}')):
-                            try:
-                                os.remove(file)
-                            except Exception:
-                                pass
-                    _, custom_ext = os.path.splitext(local_custom_image_path)
-                    if not custom_ext:
-                        custom_ext = '.jpg'
-                    dest_path = os.path.join(root_dir, f'0 - cover{custom_ext}')
-                    try:
-                        shutil.copy2(local_custom_image_path, dest_path)
-                        if print_func:
-                            print_func(f"[bold cyan]  -> 플레이리스트 커버 이미지를 커스텀 이미지로 교체했습니다.[/bold cyan]")
-                    except Exception as e:
-                        if print_func:
-                            print_func(f"[red]Failed to copy custom cover image: {e}[/red]")
-                
-                
-                final_artist = None
-                if manual_meta and manual_meta.get('artist'):
-                    final_artist = manual_meta['artist']
-                elif collector['artists']:
-                    # Use the most frequent artist as representative
-                    from collections import Counter
-                    final_artist = Counter(collector['artists']).most_common(1)[0][0]
-                
-                final_year = None
-                if manual_meta and manual_meta.get('year'):
-                    final_year = manual_meta['year']
-                elif collector['years']:
-                    final_year = str(min(collector['years']))
-                
-                try:
-                    if final_artist:
-                        subprocess.run(['xattr', '-w', 'user.artist', final_artist, root_dir], stderr=subprocess.DEVNULL, check=True)
-                    if final_year:
-                        subprocess.run(['xattr', '-w', 'user.year', final_year, root_dir], stderr=subprocess.DEVNULL, check=True)
-                    
-                    if final_artist or final_year:
-                        print_func(f"[bold cyan]  -> 디렉터리 메타데이터 업데이트: Artist='{final_artist}', Year='{final_year}'[/bold cyan]")
-                except Exception:
-                    # xattr is not available or not supported on this filesystem
-                    pass
+        if info.is_playlist and playlist_outputs:
+            finalize_playlist_dir(get_playlist_dir(info), collector, manual_meta=manual_meta, cover_image=cover_image, print_func=print_func)
 
+    except JobCancelled:
+        print_func("[bold yellow]Download cancelled. Finished tracks were kept and partial files removed.[/bold yellow]")
     except Exception as e:
         print_func(f"\n[bold red]Fatal Download Error: {e}[/bold red]")
     finally:
-        if is_temp_image and local_custom_image_path:
+        if manifest is not None:
             try:
-                if os.path.exists(local_custom_image_path):
-                    os.remove(local_custom_image_path)
-            except:
-                pass
+                manifest.close()
+            except Exception as e:
+                print_func(f"[dim red]Failed to write playlist manifest: {e}[/dim red]")
+        try:
+            enricher.save()
+        except Exception as e:
+            print_func(f"[dim red]Failed to save metadata cache: {e}[/dim red]")
+        if loudness is not None:
+            loudness.shutdown()
+        if duplicates is not None:
+            duplicates.index.close()
@@ -0,0 +1,152 @@
+import csv
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Optional
+
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'ytmd', 'metadata.json')
+FIELDS = ('artist', 'album', 'year')
+
+_NON_WORD_RE = re.compile(r'\W+')
+
+
+def normalize_title(title: Optional[str]) -> str:
+    """Key used for title lookups: case-folded with punctuation and spaces removed."""
+    if not title:
+        return ''
+    return _NON_WORD_RE.sub('', title.casefold())
+
+
+def _clean_record(record: Dict[str, Any]) -> Dict[str, str]:
+    return {field: str(record[field]).strip() for field in FIELDS if record.get(field)}
+
+
+class MetadataEnricher:
+    """
+    Fills missing artist/album/year from local sources. A user mapping file
+    (JSON or CSV, keyed by video ID or normalized title) takes precedence over
+    tags learned from earlier runs, which are kept in a persistent cache.
+    All lookups are plain dict hits, so large batches stay O(1) per track.
+    """
+
+    def __init__(self, cache_path: str = CACHE_PATH, mapping_path: Optional[str] = None):
+        self.cache_path = cache_path
+        self._lock = threading.Lock()
+        self._map_ids: Dict[str, Dict[str, str]] = {}
+        self._map_titles: Dict[str, Dict[str, str]] = {}
+        self._learned_ids: Dict[str, Dict[str, str]] = {}
+        self._learned_titles: Dict[str, Dict[str, str]] = {}
+        self._new_ids: Dict[str, Dict[str, str]] = {}
+        self._new_titles: Dict[str, Dict[str, str]] = {}
+
+        self._learned_ids, self._learned_titles = self._load_cache()
+        if mapping_path:
+            self.load_mapping(mapping_path)
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data.get('ids', {}), data.get('titles', {})
+        except (OSError, ValueError):
+            return {}, {}
+
+    def load_mapping(self, path: str) -> None:
+        """
+        Load a user mapping. JSON may be a list of records or an object keyed by
+        video ID; CSV needs a header with any of: id, title, artist, album, year.
+        """
+        if path.lower().endswith('.csv'):
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                records = list(csv.DictReader(f))
+        else:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                records = [dict(value, id=key) for key, value in data.items()]
+            else:
+                records = data
+
+        for record in records:
+            values = _clean_record(record)
+            if not values:
+                continue
+            if record.get('id'):
+                self._map_ids[str(record['id']).strip()] = values
+            if record.get('title'):
+                self._map_titles[normalize_title(record['title'])] = values
+
+    def lookup(self, video_id: Optional[str], title: Optional[str], artist: Optional[str] = None) -> Dict[str, str]:
+        """
+        Return known artist/album/year for a track, most specific source first.
+        The user mapping may match by title alone. Learned tags match by video
+        ID; a learned title entry is only used when `artist` is known and equal
+        to the learned artist, because common titles ("Intro", "Home") repeat
+        across unrelated albums.
+        """
+        title_key = normalize_title(title)
+        artist_key = artist.casefold() if artist else None
+        result: Dict[str, str] = {}
+        with self._lock:
+            for source, key, needs_artist in ((self._map_ids, video_id, False), (self._map_titles, title_key, False),
+                                              (self._new_ids, video_id, False), (self._learned_ids, video_id, False),
+                                              (self._new_titles, title_key, True), (self._learned_titles, title_key, True)):
+                if not key:
+                    continue
+                record = source.get(key)
+                if not record:
+                    continue
+                if needs_artist and (artist_key is None or (record.get('artist') or '').casefold() != artist_key):
+                    continue
+                for field, value in record.items():
+                    result.setdefault(field, value)
+                if len(result) == len(FIELDS):
+                    break
+        return result
+
+    def record(self, video_id: Optional[str], title: Optional[str], tags: Dict[str, Any]) -> None:
+        """Remember confirmed tags (manual input or yt-dlp metadata, never fallbacks)."""
+        values = _clean_record(tags)
+        if not values:
+            return
+        title_key = normalize_title(title)
+        with self._lock:
+            if video_id:
+                self._new_ids.setdefault(video_id, {}).update(values)
+            if title_key:
+                self._new_titles.setdefault(title_key, {}).update(values)
+
+    def save(self) -> None:
+        """Merge newly learned tags into the cache file (re-reading it so concurrent runs are kept)."""
+        with self._lock:
+            if not self._new_ids and not self._new_titles:
+                return
+            ids, titles = self._load_cache()
+            for key, values in self._new_ids.items():
+                ids.setdefault(key, {}).update(values)
+            for key, values in self._new_titles.items():
+                titles.setdefault(key, {}).update(values)
+
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f'{self.cache_path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'ids': ids, 'titles': titles}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+
+            self._learned_ids, self._learned_titles = ids, titles
+            self._new_ids, self._new_titles = {}, {}
+
+
+_enrichers: Dict[Optional[str], MetadataEnricher] = {}
+_enrichers_lock = threading.Lock()
+
+
+def get_metadata_enricher(mapping_path: Optional[str] = None) -> MetadataEnricher:
+    """Return a process-wide enricher per mapping file, so playlists share lookups."""
+    with _enrichers_lock:
+        enricher = _enrichers.get(mapping_path)
+        if enricher is None:
+            enricher = MetadataEnricher(mapping_path=mapping_path)
+            _enrichers[mapping_path] = enricher
+        return enricher
@@ -0,0 +1,260 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import threading
+from array import array
+from collections import Counter
+from typing import List, Optional, Tuple
+
+from ytmd.output import DOWNLOAD_ROOT
+
+INDEX_FILENAME = '.ytmd-fingerprints.sqlite'
+
+FINGERPRINT_SECONDS = 120      # only the first two minutes are fingerprinted
+SAMPLE_RATE = 5512
+FRAME_SIZE = 2048
+HOP_SIZE = 512
+BAND_EDGES_HZ = (300, 2000)
+
+MIN_HASH_HITS = 8              # exact sub-fingerprint matches needed to consider a candidate
+MAX_BIT_ERROR_RATE = 0.30      # fraction of differing bits still considered the same recording
+
+
+class FingerprintUnavailable(Exception):
+    """Raised when neither chromaprint's fpcalc nor NumPy is available."""
+
+
+def _fpcalc_fingerprint(filepath: str) -> Optional[List[int]]:
+    """Use chromaprint's fpcalc when it is installed."""
+    if not shutil.which('fpcalc'):
+        return None
+    result = subprocess.run(
+        ['fpcalc', '-raw', '-length', str(FINGERPRINT_SECONDS), filepath],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return None
+    for line in result.stdout.splitlines():
+        if line.startswith('FINGERPRINT='):
+            # fpcalc prints signed or unsigned 32-bit values depending on version
+            return [int(v) & 0xFFFFFFFF for v in line[len('FINGERPRINT='):].split(',') if v]
+    return None
+
+
+def _spectral_fingerprint(filepath: str) -> List[int]:
+    """
+    Local spectral hash: 33 log-spaced bands between 300 Hz and 2 kHz, one
+    32-bit word per frame from the signs of band energy differences across
+    neighbouring bands and frames.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise FingerprintUnavailable("Install chromaprint (fpcalc) or numpy to enable fingerprinting")
+
+    result = subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-i', filepath, '-t', str(FINGERPRINT_SECONDS),
+         '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-'],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+    )
+    samples = np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32)
+    if result.returncode != 0 or len(samples) < FRAME_SIZE * 2:
+        return []
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+    spectrum = np.abs(np.fft.rfft(frames * np.hanning(FRAME_SIZE), axis=1)) ** 2
+
+    freqs = np.fft.rfftfreq(FRAME_SIZE, 1.0 / SAMPLE_RATE)
+    edges = np.geomspace(BAND_EDGES_HZ[0], BAND_EDGES_HZ[1], 34)
+    bins = np.digitize(freqs, edges) - 1
+    energy = np.zeros((len(frames), 33), dtype=np.float64)
+    for band in range(33):
+        mask = bins == band
+        if mask.any():
+            energy[:, band] = spectrum[:, mask].sum(axis=1)
+
+    band_diff = energy[:, :-1] - energy[:, 1:]
+    bits = (band_diff[1:] - band_diff[:-1]) > 0
+    weights = (1 << np.arange(32, dtype=np.uint64))
+    return [int(v) for v in (bits.astype(np.uint64) * weights).sum(axis=1)]
+
+
+def compute_fingerprint(filepath: str) -> Tuple[str, List[int]]:
+    """Return (algorithm, sub-fingerprints) for an audio file."""
+    fp = _fpcalc_fingerprint(filepath)
+    if fp:
+        return 'chromaprint', fp
+    return 'spectral', _spectral_fingerprint(filepath)
+
+
+def bit_error_rate(a: List[int], b: List[int], offset: int = 0) -> float:
+    """Fraction of differing bits between two fingerprints aligned at `offset` (b shifted)."""
+    pairs = [(x, b[i + offset]) for i, x in enumerate(a) if 0 <= i + offset < len(b)]
+    if not pairs:
+        return 1.0
+    errors = sum(bin(x ^ y).count('1') for x, y in pairs)
+    return errors / (32 * len(pairs))
+
+
+class FingerprintIndex:
+    """
+    SQLite index of library fingerprints. Each track's distinct sub-fingerprint
+    values are indexed, so candidate lookup is a handful of indexed queries and
+    only candidates are compared bit-by-bit. Paths are stored relative to the
+    index's directory.
+    """
+
+    def __init__(self, root: str = DOWNLOAD_ROOT, path: str = None):
+        self.root = root
+        self.path = path or os.path.join(root, INDEX_FILENAME)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS tracks (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                algorithm TEXT NOT NULL,
+                mtime REAL,
+                fingerprint BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS hashes (
+                hash INTEGER NOT NULL,
+                track_id INTEGER NOT NULL REFERENCES tracks(id) ON DELETE CASCADE
+            );
+            CREATE INDEX IF NOT EXISTS hashes_hash ON hashes(hash);
+            CREATE INDEX IF NOT EXISTS hashes_track ON hashes(track_id);
+        """)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _relpath(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.root))
+
+    def abspath(self, relpath: str) -> str:
+        return os.path.join(self.root, relpath)
+
+    def get_mtime(self, path: str) -> Optional[float]:
+        with self._lock:
+            row = self.conn.execute('SELECT mtime FROM tracks WHERE path = ?', (self._relpath(path),)).fetchone()
+        return row[0] if row else None
+
+    def get_fingerprint(self, path: str) -> Optional[Tuple[str, List[int]]]:
+        with self._lock:
+            row = self.conn.execute(
+                'SELECT algorithm, fingerprint FROM tracks WHERE path = ?', (self._relpath(path),)
+            ).fetchone()
+        if not row:
+            return None
+        fingerprint = array('I')
+        fingerprint.frombytes(row[1])
+        return row[0], fingerprint.tolist()
+
+    def add(self, path: str, algorithm: str, fingerprint: List[int], mtime: float = None) -> None:
+        if not fingerprint:
+            return
+        relpath = self._relpath(path)
+        blob = array('I', fingerprint).tobytes()
+        with self._lock, self.conn:
+            old = self.conn.execute('SELECT id FROM tracks WHERE path = ?', (relpath,)).fetchone()
+            if old:
+                self.conn.execute('DELETE FROM hashes WHERE track_id = ?', (old[0],))
+                self.conn.execute('DELETE FROM tracks WHERE id = ?', (old[0],))
+            cur = self.conn.execute(
+                'INSERT INTO tracks (path, algorithm, mtime, fingerprint) VALUES (?, ?, ?, ?)',
+                (relpath, algorithm, mtime, blob)
+            )
+            # SQLite integers are signed 64-bit, unsigned 32-bit values fit as-is
+            self.conn.executemany(
+                'INSERT INTO hashes (hash, track_id) VALUES (?, ?)',
+                ((h, cur.lastrowid) for h in set(fingerprint))
+            )
+
+    def remove(self, path: str) -> None:
+        relpath = self._relpath(path)
+        with self._lock, self.conn:
+            row = self.conn.execute('SELECT id FROM tracks WHERE path = ?', (relpath,)).fetchone()
+            if row:
+                self.conn.execute('DELETE FROM hashes WHERE track_id = ?', (row[0],))
+                self.conn.execute('DELETE FROM tracks WHERE id = ?', (row[0],))
+
+    def prune_missing(self) -> int:
+        """Drop entries whose files no longer exist."""
+        with self._lock:
+            rows = self.conn.execute('SELECT path FROM tracks').fetchall()
+        missing = [p for (p,) in rows if not os.path.exists(self.abspath(p))]
+        for relpath in missing:
+            self.remove(self.abspath(relpath))
+        return len(missing)
+
+    def find_match(self, algorithm: str, fingerprint: List[int], exclude_path: str = None) -> Optional[Tuple[str, float]]:
+        """Return (path, similarity) of the closest indexed recording, if any is close enough."""
+        if not fingerprint:
+            return None
+        exclude = self._relpath(exclude_path) if exclude_path else None
+        # Position of each distinct value in the query, for offset estimation
+        positions = {}
+        for i, h in enumerate(fingerprint):
+            positions.setdefault(h, i)
+
+        hits = Counter()
+        with self._lock:
+            values = list(positions)
+            for start in range(0, len(values), 500):
+                chunk = values[start:start + 500]
+                rows = self.conn.execute(
+                    f'SELECT track_id FROM hashes WHERE hash IN ({",".join("?" * len(chunk))})', chunk
+                ).fetchall()
+                hits.update(track_id for (track_id,) in rows)
+
+            candidates = []
+            for track_id, count in hits.most_common(10):
+                if count < MIN_HASH_HITS:
+                    break
+                row = self.conn.execute(
+                    'SELECT path, algorithm, fingerprint FROM tracks WHERE id = ?', (track_id,)
+                ).fetchone()
+                if row and row[1] == algorithm and row[0] != exclude:
+                    candidates.append(row)
+
+        best = None
+        for relpath, _, blob in candidates:
+            other = array('I')
+            other.frombytes(blob)
+            other = other.tolist()
+            other_positions = {}
+            for i, h in enumerate(other):
+                other_positions.setdefault(h, i)
+            # Most common alignment between shared values
+            offsets = Counter(other_positions[h] - i for h, i in positions.items() if h in other_positions)
+            offset = offsets.most_common(1)[0][0] if offsets else 0
+            ber = bit_error_rate(fingerprint, other, offset)
+            if ber <= MAX_BIT_ERROR_RATE and (best is None or ber < best[1]):
+                best = (relpath, ber)
+
+        if best is None:
+            return None
+        return self.abspath(best[0]), 1.0 - best[1]
+
+
+class DuplicateDetector:
+    """
+    Checks freshly downloaded tracks against the library index before tagging.
+    `mode` is 'flag' (report and keep) or 'skip' (report and drop the file).
+    """
+
+    def __init__(self, index: FingerprintIndex, mode: str = 'flag'):
+        self.index = index
+        self.mode = mode
+        self.enabled = True
+
+    def check(self, filepath: str, final_path: str = None) -> Optional[Tuple[str, float]]:
+        """Fingerprint `filepath`, return a likely duplicate, and index the track unless it will be skipped."""
+        final_path = final_path or filepath
+        algorithm, fingerprint = compute_fingerprint(filepath)
+        match = self.index.find_match(algorithm, fingerprint, exclude_path=final_path)
+        if not (match and self.mode == 'skip'):
+            self.index.add(final_path, algorithm, fingerprint, mtime=None)
+        return match
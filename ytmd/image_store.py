@@ -0,0 +1,214 @@
+import hashlib
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from ytmd.artwork import sniff_image_type
+
+STORE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ytmd', 'images')
+MAX_STORE_BYTES = 512 * 1024 * 1024
+MEMORY_CACHE_ITEMS = 16
+
+# Stored objects: "<root>/ab/<sha256>.jpg"; URL references and partial files are not objects
+_OBJECT_RE = re.compile(r'^[0-9a-f]{64}\.(?:jpg|png)$')
+
+MIME_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.png': 'image/png',
+}
+
+
+class StoredImage:
+    """A normalised image held in the store, addressed by the hash of its source bytes."""
+    __slots__ = ('digest', 'path', 'ext')
+
+    def __init__(self, digest: str, path: str, ext: str):
+        self.digest = digest
+        self.path = path
+        self.ext = ext
+
+    @property
+    def mime(self) -> str:
+        return MIME_TYPES.get(self.ext, 'image/jpeg')
+
+
+class ImageStore:
+    """
+    Content-addressed store for cover art and thumbnails shared across runs.
+    Each distinct image is validated and normalised (to JPEG/PNG) once, and
+    the store is kept under `max_bytes` by evicting least recently used files.
+    """
+
+    def __init__(self, root: str = STORE_DIR, max_bytes: int = MAX_STORE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+
+    def _object_path(self, digest: str, ext: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + ext)
+
+    def get(self, digest: str) -> Optional[StoredImage]:
+        """Look up an image by digest, marking it as recently used."""
+        for ext in ('.jpg', '.png'):
+            path = self._object_path(digest, ext)
+            if os.path.isfile(path):
+                try:
+                    os.utime(path)
+                except OSError:
+                    pass
+                return StoredImage(digest, path, ext)
+        return None
+
+    def add_file(self, path: str) -> StoredImage:
+        """Add an image file to the store and return the stored (normalised) copy."""
+        with open(path, 'rb') as f:
+            data = f.read()
+        return self.add_bytes(data)
+
+    def add_bytes(self, data: bytes) -> StoredImage:
+        source_ext = sniff_image_type(data[:12])
+        if source_ext is None:
+            raise ValueError("Not a supported image format")
+
+        digest = hashlib.sha256(data).hexdigest()
+        existing = self.get(digest)
+        if existing:
+            return existing
+
+        os.makedirs(os.path.join(self.root, digest[:2]), exist_ok=True)
+        if source_ext in MIME_TYPES:
+            ext = source_ext
+            self._write_atomic(self._object_path(digest, ext), data)
+        else:
+            # WebP/GIF are poorly supported in ID3 APIC frames, convert once with ffmpeg
+            ext = '.jpg'
+            if not self._convert_to_jpeg(data, source_ext, self._object_path(digest, ext)):
+                raise ValueError(f"Failed to normalise {source_ext} image")
+
+        path = self._object_path(digest, ext)
+        self.evict(keep=path)
+        return StoredImage(digest, path, ext)
+
+    def read(self, image: StoredImage) -> bytes:
+        """Return the bytes of a stored image, served from a small in-memory LRU."""
+        with self._lock:
+            data = self._memory.get(image.digest)
+            if data is not None:
+                self._memory.move_to_end(image.digest)
+                return data
+        with open(image.path, 'rb') as f:
+            data = f.read()
+        with self._lock:
+            self._memory[image.digest] = data
+            while len(self._memory) > MEMORY_CACHE_ITEMS:
+                self._memory.popitem(last=False)
+        return data
+
+    def link_into(self, image: StoredImage, dest_path: str) -> None:
+        """Place a stored image at `dest_path`, hardlinking when the filesystem allows it."""
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+        try:
+            os.link(image.path, dest_path)
+        except OSError:
+            # Cross-device or unsupported filesystem
+            shutil.copy2(image.path, dest_path)
+
+    def evict(self, keep: str = None) -> None:
+        """
+        Remove least recently used images until the store fits in `max_bytes`.
+        Only stored objects count and are evicted; the `urls/` references and
+        in-progress `.part` files of concurrent fetches are left alone.
+        """
+        with self._lock:
+            files = []
+            total = 0
+            try:
+                shards = [d for d in os.listdir(self.root) if len(d) == 2]
+            except OSError:
+                return
+            for shard in shards:
+                shard_dir = os.path.join(self.root, shard)
+                try:
+                    names = os.listdir(shard_dir)
+                except OSError:
+                    continue
+                for name in names:
+                    if not name.startswith(shard) or not _OBJECT_RE.match(name):
+                        continue
+                    path = os.path.join(shard_dir, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            files.sort()
+            for _, size, path in files:
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                try:
+                    os.remove(path)
+                    total -= size
+                except OSError:
+                    pass
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _convert_to_jpeg(self, data: bytes, source_ext: str, dest_path: str) -> bool:
+        fd, src_path = tempfile.mkstemp(suffix=source_ext)
+        tmp_dest = dest_path + '.part.jpg'
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            result = subprocess.run(
+                ['ffmpeg', '-y', '-loglevel', 'error', '-i', src_path, '-frames:v', '1', tmp_dest],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+            )
+            if result.returncode != 0 or not os.path.exists(tmp_dest):
+                return False
+            os.replace(tmp_dest, dest_path)
+            return True
+        except OSError:
+            return False
+        finally:
+            for p in (src_path, tmp_dest):
+                if os.path.exists(p):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+
+
+_default_store: Optional[ImageStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_image_store() -> ImageStore:
+    """Return the process-wide image store."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ImageStore()
+        return _default_store
@@ -0,0 +1,102 @@
+import math
+import os
+import re
+import subprocess
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+REFERENCE_LUFS = -18.0  # ReplayGain 2.0 reference loudness
+
+_INTEGRATED_RE = re.compile(r'I:\s+(-?[\d.]+|-inf) LUFS')
+_PEAK_RE = re.compile(r'Peak:\s+(-?[\d.]+|-inf) dBFS')
+_DURATION_RE = re.compile(r'Duration:\s+(\d+):(\d+):(\d+(?:\.\d+)?)')
+
+
+class LoudnessResult:
+    """EBU R128 measurement for one track."""
+    __slots__ = ('integrated', 'peak', 'duration')
+
+    def __init__(self, integrated: float, peak: float, duration: float):
+        self.integrated = integrated  # LUFS
+        self.peak = peak              # linear true peak (1.0 == 0 dBFS)
+        self.duration = duration      # seconds
+
+
+def _parse_db(value: str) -> float:
+    return float('-inf') if value == '-inf' else float(value)
+
+
+def analyze_loudness(filepath: str) -> LoudnessResult:
+    """Measure integrated loudness and true peak with ffmpeg's ebur128 filter."""
+    result = subprocess.run(
+        ['ffmpeg', '-nostats', '-hide_banner', '-i', filepath,
+         '-filter_complex', 'ebur128=peak=true', '-f', 'null', '-'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors='replace'
+    )
+    output = result.stderr
+    integrated = _INTEGRATED_RE.findall(output)
+    peaks = _PEAK_RE.findall(output)
+    if result.returncode != 0 or not integrated:
+        raise RuntimeError(f"ffmpeg loudness analysis failed (exit {result.returncode})")
+
+    duration = 0.0
+    match = _DURATION_RE.search(output)
+    if match:
+        hours, minutes, seconds = match.groups()
+        duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    # The summary block is printed last, so take the final matches
+    peak_db = _parse_db(peaks[-1]) if peaks else 0.0
+    return LoudnessResult(
+        integrated=_parse_db(integrated[-1]),
+        peak=10 ** (peak_db / 20) if peak_db != float('-inf') else 0.0,
+        duration=duration,
+    )
+
+
+def album_loudness(results: List[LoudnessResult]) -> Optional[LoudnessResult]:
+    """
+    Combine per-track measurements into album loudness by averaging the
+    tracks' energy weighted by duration, and taking the maximum peak.
+    """
+    measured = [r for r in results if r.integrated != float('-inf')]
+    if not measured:
+        return None
+    total = sum(r.duration or 1.0 for r in measured)
+    energy = sum((r.duration or 1.0) * 10 ** (r.integrated / 10) for r in measured) / total
+    return LoudnessResult(
+        integrated=10 * math.log10(energy),
+        peak=max(r.peak for r in results),
+        duration=sum(r.duration for r in results),
+    )
+
+
+def replaygain_tags(track: LoudnessResult, album: Optional[LoudnessResult] = None) -> Dict[str, str]:
+    """Return TXXX ReplayGain values for a track (and its album, if known)."""
+    tags = {}
+    if track.integrated != float('-inf'):
+        tags['REPLAYGAIN_TRACK_GAIN'] = f'{REFERENCE_LUFS - track.integrated:+.2f} dB'
+        tags['REPLAYGAIN_TRACK_PEAK'] = f'{track.peak:.6f}'
+    if album is not None:
+        tags['REPLAYGAIN_ALBUM_GAIN'] = f'{REFERENCE_LUFS - album.integrated:+.2f} dB'
+        tags['REPLAYGAIN_ALBUM_PEAK'] = f'{album.peak:.6f}'
+    return tags
+
+
+class LoudnessAnalyzer:
+    """Runs loudness analysis for several tracks in parallel ffmpeg processes."""
+
+    def __init__(self, max_workers: int = None):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 2, thread_name_prefix='loudness')
+
+    def submit(self, filepath: str) -> "Future[LoudnessResult]":
+        return self.executor.submit(analyze_loudness, filepath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,192 @@
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+MANIFEST_FILENAME = 'manifest.json'
+PLAYLIST_FILENAME = 'playlist.m3u8'
+MANIFEST_VERSION = 1
+
+_POSITION_RE = re.compile(r'^(\d+) - ')
+
+
+def _sort_key(relpath: str):
+    """Order by the "N - " prefix of each path component (split pieces sort inside their source)."""
+    key = []
+    for part in relpath.split('/'):
+        match = _POSITION_RE.match(part)
+        key.append((0, int(match.group(1)), part) if match else (1, 0, part))
+    return key
+
+
+def _write_atomic(path: str, text: str) -> None:
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class PlaylistManifest:
+    """
+    Keeps `playlist.m3u8` and `manifest.json` in a playlist folder up to date
+    as tracks are published, so consumers can load order, durations, tags and
+    cover hashes with one small read instead of walking and parsing every MP3.
+    Existing manifests are loaded and extended; entries whose files are gone
+    are dropped. Writes are atomic and throttled to `min_interval` seconds.
+    """
+
+    def __init__(self, root_dir: str, title: Optional[str] = None, url: Optional[str] = None, min_interval: float = 1.0):
+        self.root_dir = root_dir
+        self.title = title
+        self.url = url
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._tracks: Dict[str, Dict[str, Any]] = {}
+        self._dirty = False
+        self._last_write = 0.0
+        self._load()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root_dir, MANIFEST_FILENAME)
+
+    @property
+    def playlist_path(self) -> str:
+        return os.path.join(self.root_dir, PLAYLIST_FILENAME)
+
+    def _load(self) -> None:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.title = self.title or data.get('title')
+        self.url = self.url or data.get('url')
+        for track in data.get('tracks') or []:
+            path = track.get('path')
+            if path and os.path.isfile(os.path.join(self.root_dir, path)):
+                self._tracks[path] = track
+            else:
+                self._dirty = True
+
+    def _relpath(self, path: str) -> Optional[str]:
+        relpath = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root_dir))
+        if relpath.startswith('..'):
+            return None
+        return relpath.replace(os.sep, '/')
+
+    def add(self, path: str, tags: Dict[str, Any], duration: Optional[float] = None,
+            cover_digest: Optional[str] = None, replaygain: Optional[Dict[str, str]] = None) -> None:
+        """Record a published track and write the manifest if the throttle allows it."""
+        relpath = self._relpath(path)
+        if relpath is None:
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+
+        track = {
+            'path': relpath,
+            'duration': round(duration, 3) if duration else None,
+            'size': size,
+            'title': tags.get('title'),
+            'artist': tags.get('artist'),
+            'album': tags.get('album'),
+            'year': tags.get('year'),
+            'track': tags.get('track'),
+            'cover_sha256': cover_digest,
+        }
+        if replaygain:
+            track['replaygain'] = replaygain
+
+        with self._lock:
+            self._tracks[relpath] = track
+            self._dirty = True
+            if time.monotonic() - self._last_write >= self.min_interval:
+                self._write()
+
+    def rename(self, old_path: str, new_path: str, track_number: Optional[str] = None) -> None:
+        """Follow a renamed track file or split-track folder (paths relative to the playlist folder)."""
+        old_rel, new_rel = old_path.replace(os.sep, '/'), new_path.replace(os.sep, '/')
+        with self._lock:
+            for relpath in list(self._tracks):
+                if relpath == old_rel:
+                    moved = new_rel
+                elif relpath.startswith(old_rel + '/'):
+                    moved = new_rel + relpath[len(old_rel):]
+                else:
+                    continue
+                track = self._tracks.pop(relpath)
+                track['path'] = moved
+                if track_number and relpath == old_rel:
+                    track['track'] = track_number
+                self._tracks[moved] = track
+                self._dirty = True
+
+    def remove(self, path: str) -> List[Dict[str, Any]]:
+        """
+        Drop a deleted (or no longer listed) track file or split-track folder
+        (path relative to the playlist folder). Returns the dropped entries.
+        """
+        rel = path.replace(os.sep, '/')
+        removed = []
+        with self._lock:
+            for relpath in list(self._tracks):
+                if relpath == rel or relpath.startswith(rel + '/'):
+                    removed.append(self._tracks.pop(relpath))
+                    self._dirty = True
+        return removed
+
+    def restore(self, tracks: List[Dict[str, Any]]) -> None:
+        """Put back entries returned by remove() whose files are still there."""
+        with self._lock:
+            for track in tracks:
+                if os.path.isfile(os.path.join(self.root_dir, track['path'])):
+                    self._tracks[track['path']] = track
+                    self._dirty = True
+
+    def tracks(self) -> List[Dict[str, Any]]:
+        """Recorded tracks in playlist order."""
+        with self._lock:
+            return [dict(self._tracks[p]) for p in sorted(self._tracks, key=_sort_key)]
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._dirty:
+                self._write()
+
+    def close(self) -> None:
+        self.flush()
+
+    def _write(self) -> None:
+        """Write both files; the caller holds the lock."""
+        tracks = [self._tracks[p] for p in sorted(self._tracks, key=_sort_key)]
+        durations = [t['duration'] for t in tracks if t.get('duration')]
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'title': self.title,
+            'url': self.url,
+            'updated': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'total_duration': round(sum(durations), 3),
+            'tracks': tracks,
+        }
+
+        lines = ['#EXTM3U']
+        if self.title:
+            lines.append(f'#PLAYLIST:{self.title}')
+        for track in tracks:
+            label = track.get('title') or os.path.basename(track['path'])
+            if track.get('artist'):
+                label = f"{track['artist']} - {label}"
+            lines.append(f"#EXTINF:{int(round(track.get('duration') or -1))},{label}")
+            lines.append(track['path'])
+
+        os.makedirs(self.root_dir, exist_ok=True)
+        _write_atomic(self.manifest_path, json.dumps(manifest, ensure_ascii=False, indent=1))
+        _write_atomic(self.playlist_path, '\n'.join(lines) + '\n')
+        self._dirty = False
+        self._last_write = time.monotonic()
@@ -0,0 +1,81 @@
+from typing import Any, Dict, List, Optional
+
+
+class Entry:
+    """A single playlist entry, holding only the fields the app uses."""
+    __slots__ = ('id', 'title', 'duration', 'index', 'artist', 'album', 'year')
+
+    def __init__(self, id: Optional[str], title: str, duration: Optional[float], index: int,
+                 artist: Optional[str] = None, album: Optional[str] = None, year: Optional[str] = None):
+        self.id = id
+        self.title = title
+        self.duration = duration
+        self.index = index
+        self.artist = artist
+        self.album = album
+        self.year = year
+
+    @classmethod
+    def from_info_dict(cls, entry: Dict[str, Any], index: int) -> "Entry":
+        year = entry.get('release_year')
+        if not year and entry.get('upload_date'):
+            upload_date = str(entry['upload_date'])
+            if len(upload_date) >= 4:
+                year = upload_date[:4]
+
+        artist = entry.get('artist')
+        if not artist and entry.get('artists'):
+            artist = ', '.join(entry['artists'])
+
+        return cls(
+            id=entry.get('id'),
+            title=entry.get('title') or 'Unknown',
+            duration=entry.get('duration'),
+            index=index,
+            artist=artist,
+            album=entry.get('album'),
+            year=str(year) if year else None,
+        )
+
+
+class MediaInfo:
+    """
+    Slim replacement for yt-dlp's info dict. For playlists `entries` keeps one
+    slot per playlist position, with None for unavailable videos, so indices
+    still line up with yt-dlp's playlist_index.
+    """
+    __slots__ = ('id', 'title', 'url', 'is_playlist', 'entries')
+
+    def __init__(self, id: Optional[str], title: str, url: Optional[str], is_playlist: bool, entries: List[Optional[Entry]]):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.is_playlist = is_playlist
+        self.entries = entries
+
+    @classmethod
+    def from_info_dict(cls, info: Dict[str, Any]) -> "MediaInfo":
+        if 'entries' in info:
+            entries = [
+                Entry.from_info_dict(entry, i) if entry else None
+                for i, entry in enumerate(info.get('entries') or [], 1)
+            ]
+            return cls(info.get('id'), info.get('title', 'Unknown'), info.get('webpage_url'), True, entries)
+
+        entry = Entry.from_info_dict(info, 1) if info else None
+        return cls(info.get('id'), info.get('title', 'Unknown'), info.get('webpage_url'), False, [entry] if entry else [])
+
+    def valid_entries(self) -> List[Entry]:
+        return [e for e in self.entries if e is not None]
+
+    @property
+    def total_items(self) -> int:
+        return sum(1 for e in self.entries if e is not None)
+
+    @property
+    def total_duration(self) -> float:
+        return sum(e.duration or 0 for e in self.entries if e is not None)
+
+    def subset(self, entries: List[Entry]) -> "MediaInfo":
+        """Return a copy restricted to `entries` (used for partial playlist downloads)."""
+        return MediaInfo(self.id, self.title, self.url, self.is_playlist, list(entries))
@@ -0,0 +1,158 @@
+import os
+import shutil
+import tempfile
+from typing import List, Optional
+
+DOWNLOAD_ROOT = 'download'
+STAGING_DIRNAME = '.ytmd-staging'
+SCRATCH_ENV = 'YTMD_SCRATCH_DIR'
+
+BITRATE_KBPS = 192
+DEFAULT_TRACK_SECONDS = 300   # assumed length for entries without a duration
+SPACE_MARGIN = 2.0            # source audio + transcoded MP3 + thumbnails
+
+# Files yt-dlp leaves behind mid-download, never published
+PARTIAL_SUFFIXES = ('.part', '.ytdl', '.temp', '.tmp')
+
+
+class InsufficientSpaceError(Exception):
+    """Raised when the target filesystem cannot hold the estimated download."""
+
+
+def estimate_output_bytes(total_seconds: float, missing_durations: int = 0) -> int:
+    """Estimate the bytes needed for a download from the summed entry durations."""
+    seconds = total_seconds + missing_durations * DEFAULT_TRACK_SECONDS
+    return int(seconds * BITRATE_KBPS * 1000 / 8 * SPACE_MARGIN)
+
+
+def _fsync_path(path: str, directory: bool = False) -> None:
+    flags = os.O_RDONLY
+    if directory and hasattr(os, 'O_DIRECTORY'):
+        flags |= os.O_DIRECTORY
+    try:
+        fd = os.open(path, flags)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Directories cannot be fsynced on some platforms (e.g. Windows)
+        pass
+    finally:
+        os.close(fd)
+
+
+class OutputWriter:
+    """
+    Stages a download job in a scratch directory and publishes finished files
+    into the download folder with a single atomic rename, so half-written or
+    half-tagged MP3s are never visible to media servers. The scratch directory
+    defaults to `download/.ytmd-staging` and can be moved (e.g. to a tmpfs)
+    with the YTMD_SCRATCH_DIR environment variable.
+    """
+
+    def __init__(self, final_root: str = DOWNLOAD_ROOT, scratch_dir: Optional[str] = None):
+        self.final_root = final_root
+        self.scratch_dir = scratch_dir or os.environ.get(SCRATCH_ENV) or os.path.join(final_root, STAGING_DIRNAME)
+        self.staging_root: Optional[str] = None
+        self._pending_sync: List[str] = []
+
+    def __enter__(self):
+        os.makedirs(self.final_root, exist_ok=True)
+        os.makedirs(self.scratch_dir, exist_ok=True)
+        self.staging_root = tempfile.mkdtemp(prefix='job-', dir=self.scratch_dir)
+        self.same_device = os.stat(self.staging_root).st_dev == os.stat(self.final_root).st_dev
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.finalize()
+        self.cleanup()
+
+    def check_free_space(self, total_seconds: float, missing_durations: int = 0,
+                         largest_seconds: float = 0, deferred: bool = False) -> int:
+        """
+        Raise InsufficientSpaceError if the download folder (and the scratch
+        directory, when it lives on another filesystem) is too small. Tracks
+        leave the scratch directory as soon as they are published, so it only
+        has to hold the largest one, or the whole job when publishing is
+        `deferred` until the end (e.g. for ReplayGain album analysis).
+        """
+        required = estimate_output_bytes(total_seconds, missing_durations)
+        os.makedirs(self.final_root, exist_ok=True)
+        targets = [(self.final_root, required)]
+        scratch = self.staging_root or self.scratch_dir
+        if os.path.isdir(scratch) and os.stat(scratch).st_dev != os.stat(self.final_root).st_dev:
+            if not deferred:
+                if missing_durations:
+                    largest_seconds = max(largest_seconds, DEFAULT_TRACK_SECONDS)
+                required = estimate_output_bytes(largest_seconds)
+            targets.append((scratch, required))
+
+        for target, required in targets:
+            free = shutil.disk_usage(target).free
+            if free < required:
+                raise InsufficientSpaceError(
+                    f"Not enough free space in {target}: need ~{required // (1024 * 1024)} MB, have {free // (1024 * 1024)} MB"
+                )
+        return targets[0][1]
+
+    def staging_path(self, relative_path: str) -> str:
+        """Return the path (or yt-dlp output template) inside the staging directory."""
+        return os.path.join(self.staging_root, relative_path)
+
+    def final_path(self, staged_path: str) -> str:
+        return os.path.join(self.final_root, os.path.relpath(staged_path, self.staging_root))
+
+    def is_staged(self, path: str) -> bool:
+        if not self.staging_root:
+            return False
+        return os.path.abspath(path).startswith(os.path.abspath(self.staging_root) + os.sep)
+
+    def publish(self, staged_path: str) -> str:
+        """Move a finished file into the download folder and return its final path."""
+        dest = self.final_path(staged_path)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        if self.same_device:
+            os.replace(staged_path, dest)
+        else:
+            # Copy next to the destination first so the visible rename stays atomic
+            tmp_dest = os.path.join(os.path.dirname(dest), f'.{os.path.basename(dest)}.part')
+            shutil.copyfile(staged_path, tmp_dest)
+            _fsync_path(tmp_dest)
+            os.replace(tmp_dest, dest)
+            os.remove(staged_path)
+        self._pending_sync.append(dest)
+        return dest
+
+    def flush(self) -> None:
+        """Fsync everything published since the last flush, then each directory once."""
+        directories = []
+        for path in self._pending_sync:
+            _fsync_path(path)
+            parent = os.path.dirname(path)
+            if parent not in directories:
+                directories.append(parent)
+        for directory in directories:
+            _fsync_path(directory, directory=True)
+        self._pending_sync = []
+
+    def finalize(self) -> None:
+        """Publish remaining finished files (e.g. playlist thumbnails) and flush the album."""
+        if self.staging_root and os.path.isdir(self.staging_root):
+            for dirpath, _, filenames in os.walk(self.staging_root):
+                for name in sorted(filenames):
+                    if name.endswith(PARTIAL_SUFFIXES):
+                        continue
+                    self.publish(os.path.join(dirpath, name))
+        self.flush()
+
+    def cleanup(self) -> None:
+        """Remove the staging directory along with any partial downloads."""
+        if self.staging_root and os.path.isdir(self.staging_root):
+            shutil.rmtree(self.staging_root, ignore_errors=True)
+        try:
+            os.rmdir(self.scratch_dir)
+        except OSError:
+            # Still in use by another job, or not empty
+            pass
@@ -0,0 +1,496 @@
+import hashlib
+import json
+import os
+import re
+import socket
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ytmd.models import Entry, MediaInfo
+from ytmd.output import DOWNLOAD_ROOT
+
+JOBS_FILENAME = '.ytmd-jobs.sqlite'
+CLAIM_BATCH = 10          # entries of one playlist claimed (and downloaded) together
+CLAIM_LEASE = 6 * 3600    # seconds before another run may take over an abandoned claim
+MAX_ATTEMPTS = 3
+
+_POSITION_RE = re.compile(r'^(\d+) - ')
+
+
+def _bucket(key: str) -> int:
+    """Stable hash used for shard assignment (Python's hash() is salted per process)."""
+    return int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """Parse "I/N" (0-based shard I of N)."""
+    try:
+        shard, shards = (int(v) for v in value.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected I/N (e.g. 0/4)")
+    if shards < 1 or not 0 <= shard < shards:
+        raise ValueError(f"Invalid shard '{value}': I must be between 0 and N-1")
+    return shard, shards
+
+
+def read_url_list(path: str) -> List[str]:
+    """One URL per line; blank lines and lines starting with '#' are ignored."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+class JobStore:
+    """
+    Batch job list in a SQLite file. Every playlist entry (or single video) is
+    one job, keyed and assigned to a shard by a stable hash of its video ID, so any
+    number of worker processes or hosts sharing the file split the work the
+    same way. Claims run in IMMEDIATE transactions, which take SQLite's write
+    lock, so two workers never claim the same job. The rollback journal is
+    kept (not WAL) so the file also works on shared network directories that
+    support file locking.
+    """
+
+    def __init__(self, path: str = os.path.join(DOWNLOAD_ROOT, JOBS_FILENAME)):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS playlists (
+                url TEXT PRIMARY KEY,
+                id TEXT,
+                title TEXT,
+                finalized INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY,
+                key TEXT UNIQUE NOT NULL,
+                bucket INTEGER NOT NULL,
+                url TEXT NOT NULL,
+                playlist_url TEXT REFERENCES playlists(url),
+                video_id TEXT,
+                title TEXT,
+                duration REAL,
+                playlist_index INTEGER,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                claimed_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            );
+            CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status);
+            CREATE TABLE IF NOT EXISTS results (
+                job_id INTEGER NOT NULL REFERENCES jobs(id),
+                path TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (job_id, path)
+            );
+        """)
+        # Job files written before jobs were keyed by video ID used "<playlist>#<index>"
+        self.conn.execute(
+            "UPDATE OR IGNORE jobs SET key = playlist_url || '#' || video_id "
+            "WHERE playlist_url IS NOT NULL AND video_id IS NOT NULL AND key = playlist_url || '#' || playlist_index"
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def _transaction(self):
+        self.conn.execute('BEGIN IMMEDIATE')
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+
+    def add(self, url: str, info: MediaInfo) -> int:
+        """
+        Add one job per available entry. Playlist jobs are keyed by video ID:
+        entries that moved get their new position if they have not been
+        downloaded yet, and unstarted jobs of videos no longer listed are dropped.
+        """
+        added = 0
+        with self._transaction():
+            if info.is_playlist:
+                self.conn.execute(
+                    'INSERT INTO playlists (url, id, title) VALUES (?, ?, ?) '
+                    'ON CONFLICT(url) DO UPDATE SET title = excluded.title',
+                    (url, info.id, info.title)
+                )
+            keys = set()
+            for entry in info.valid_entries():
+                if info.is_playlist and not entry.id:
+                    continue
+                key = f'{url}#{entry.id}' if info.is_playlist else url
+                keys.add(key)
+                cur = self.conn.execute(
+                    'INSERT OR IGNORE INTO jobs (key, bucket, url, playlist_url, video_id, title, duration, playlist_index) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                    (key, _bucket(entry.id or key), url, url if info.is_playlist else None,
+                     entry.id, entry.title, entry.duration, entry.index)
+                )
+                added += cur.rowcount
+                if not cur.rowcount and info.is_playlist:
+                    self.conn.execute(
+                        "UPDATE jobs SET playlist_index = ?, title = ? WHERE key = ? AND status IN ('pending', 'failed')",
+                        (entry.index, entry.title, key)
+                    )
+            if info.is_playlist:
+                stale = [
+                    (job_id,) for job_id, key in self.conn.execute(
+                        "SELECT id, key FROM jobs WHERE playlist_url = ? AND status IN ('pending', 'failed')", (url,)
+                    ) if key not in keys
+                ]
+                self.conn.executemany('DELETE FROM jobs WHERE id = ?', stale)
+            if added and info.is_playlist:
+                # New entries reopen the playlist for aggregation
+                self.conn.execute('UPDATE playlists SET finalized = 0 WHERE url = ?', (url,))
+        return added
+
+    def claim(self, shard: int, shards: int, worker: str, limit: int = CLAIM_BATCH) -> List[sqlite3.Row]:
+        """
+        Claim up to `limit` jobs of this shard, all from the same playlist (or a
+        single video), so they can go through one download_media call.
+        """
+        claimable = (
+            "bucket % ? = ? AND (status = 'pending' "
+            "OR (status = 'failed' AND attempts < ?) "
+            "OR (status = 'claimed' AND claimed_at < ?))"
+        )
+        args = (shards, shard, MAX_ATTEMPTS, time.time() - CLAIM_LEASE)
+        self.conn.row_factory = sqlite3.Row
+        try:
+            with self._transaction():
+                first = self.conn.execute(
+                    f'SELECT * FROM jobs WHERE {claimable} ORDER BY url, playlist_index LIMIT 1', args
+                ).fetchone()
+                if first is None:
+                    return []
+                if first['playlist_url'] is None:
+                    rows = [first]
+                else:
+                    rows = self.conn.execute(
+                        f'SELECT * FROM jobs WHERE {claimable} AND playlist_url = ? ORDER BY playlist_index LIMIT ?',
+                        args + (first['playlist_url'], limit)
+                    ).fetchall()
+                self.conn.executemany(
+                    "UPDATE jobs SET status = 'claimed', worker = ?, claimed_at = ?, attempts = attempts + 1 WHERE id = ?",
+                    ((worker, time.time(), row['id']) for row in rows)
+                )
+                return rows
+        finally:
+            self.conn.row_factory = None
+
+    def report(self, job_id: int, path: str, data: Dict[str, Any]) -> None:
+        with self._transaction():
+            self.conn.execute(
+                'INSERT OR REPLACE INTO results (job_id, path, data) VALUES (?, ?, ?)',
+                (job_id, path, json.dumps(data, ensure_ascii=False))
+            )
+
+    def complete(self, job_ids: Iterable[int], release_missing: bool = False,
+                 skipped: Iterable[int] = ()) -> Tuple[int, int]:
+        """
+        Mark claimed jobs done if they reported a file, skipped if they were
+        dropped as duplicates (settled, never retried), failed otherwise (or
+        pending again with `release_missing`). Returns (done, failed).
+        """
+        done = failed = 0
+        missing = []
+        skipped = set(skipped)
+        with self._transaction():
+            for job_id in job_ids:
+                has_result = self.conn.execute('SELECT 1 FROM results WHERE job_id = ? LIMIT 1', (job_id,)).fetchone()
+                if has_result:
+                    self.conn.execute("UPDATE jobs SET status = 'done', error = NULL WHERE id = ?", (job_id,))
+                    done += 1
+                elif job_id in skipped:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'skipped', error = 'duplicate of a library track' WHERE id = ?", (job_id,)
+                    )
+                elif release_missing:
+                    missing.append(job_id)
+                else:
+                    self.conn.execute(
+                        "UPDATE jobs SET status = 'failed', error = 'no file produced' WHERE id = ?", (job_id,)
+                    )
+                    failed += 1
+        if missing:
+            self.release(missing)
+        return done, failed
+
+    def release(self, job_ids: Iterable[int]) -> None:
+        """Give claims back (e.g. on Ctrl-C) without counting the attempt."""
+        with self._transaction():
+            self.conn.executemany(
+                "UPDATE jobs SET status = 'pending', worker = NULL, attempts = attempts - 1 WHERE id = ? AND status = 'claimed'",
+                ((job_id,) for job_id in job_ids)
+            )
+
+    def claim_finalization(self) -> List[Tuple[str, str]]:
+        """
+        Atomically take every playlist whose jobs are all settled and that has
+        not been aggregated yet; exactly one worker gets each playlist.
+        """
+        with self._transaction():
+            rows = self.conn.execute(
+                "SELECT url, title FROM playlists p WHERE finalized = 0 AND NOT EXISTS ("
+                " SELECT 1 FROM jobs j WHERE j.playlist_url = p.url AND (j.status IN ('pending', 'claimed')"
+                " OR (j.status = 'failed' AND j.attempts < ?)))",
+                (MAX_ATTEMPTS,)
+            ).fetchall()
+            self.conn.executemany('UPDATE playlists SET finalized = 1 WHERE url = ?', ((url,) for url, _ in rows))
+        return rows
+
+    def unfinalize(self, url: str) -> None:
+        with self._transaction():
+            self.conn.execute('UPDATE playlists SET finalized = 0 WHERE url = ?', (url,))
+
+    def results(self, playlist_url: str) -> List[Tuple[str, Dict[str, Any]]]:
+        rows = self.conn.execute(
+            'SELECT r.path, r.data FROM results r JOIN jobs j ON j.id = r.job_id WHERE j.playlist_url = ?',
+            (playlist_url,)
+        ).fetchall()
+        return [(path, json.loads(data)) for path, data in rows]
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self.conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+
+
+class JobReporter:
+    """
+    Stands in for the playlist manifest inside a worker's download_media call:
+    each published track is recorded against the job it came from, and the
+    playlist manifest is written once by the aggregation step.
+    """
+
+    def __init__(self, store: JobStore, jobs: List[sqlite3.Row], root_dir: Optional[str] = None):
+        self.store = store
+        self.root_dir = root_dir
+        self._by_index = {job['playlist_index']: job['id'] for job in jobs}
+        self._single = jobs[0]['id'] if len(jobs) == 1 and root_dir is None else None
+        self.skipped = set()
+
+    def add(self, path: str, tags: Dict[str, Any], duration: Optional[float] = None,
+            cover_digest: Optional[str] = None, replaygain: Optional[Dict[str, str]] = None) -> None:
+        if self._single is not None:
+            self.store.report(self._single, os.path.abspath(path), {'tags': tags_only(tags)})
+            return
+        relpath = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root_dir)).replace(os.sep, '/')
+        # "7 - title.mp3" or, for split uploads, "7 - title/1 - chapter.mp3"
+        match = _POSITION_RE.match(relpath)
+        job_id = self._by_index.get(int(match.group(1))) if match else None
+        if job_id is None:
+            return
+        self.store.report(job_id, relpath, {
+            'tags': tags_only(tags),
+            'duration': duration,
+            'cover_digest': cover_digest,
+            'replaygain': replaygain,
+        })
+
+    def skip(self, info: Dict[str, Any]) -> None:
+        """download_media skip_func: remember jobs whose track was dropped as a duplicate."""
+        if self._single is not None:
+            self.skipped.add(self._single)
+            return
+        job_id = self._by_index.get(int(info.get('__ytmd_split_from') or info.get('playlist_index') or 0))
+        if job_id is not None:
+            self.skipped.add(job_id)
+
+    def close(self) -> None:
+        pass
+
+
+def tags_only(tags: Dict[str, Any]) -> Dict[str, Any]:
+    """The JSON-safe text tags (the cover object is reported by digest)."""
+    return {k: v for k, v in tags.items() if k != 'cover'}
+
+
+class _WorkerProgress:
+    """One line per finished download instead of live bars, so several workers can share a terminal."""
+
+    def __init__(self, print_func):
+        self.print_func = print_func
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def yt_dlp_hook(self, d: Dict[str, Any]):
+        if d.get('status') == 'finished':
+            title = d.get('info_dict', {}).get('title', os.path.basename(d.get('filename', '')))
+            self.print_func(f"[green]Downloaded:[/green] {title}")
+
+
+def _job_info(jobs: List[sqlite3.Row], playlist: Optional[Tuple[str, str, str]]) -> MediaInfo:
+    """Rebuild a MediaInfo for the claimed jobs without fetching the playlist again."""
+    entries = [Entry(job['video_id'], job['title'], job['duration'], job['playlist_index']) for job in jobs]
+    if playlist is None:
+        job = jobs[0]
+        return MediaInfo(job['video_id'], job['title'], job['url'], False, entries)
+    url, playlist_id, title = playlist
+    return MediaInfo(playlist_id, title, url, True, entries)
+
+
+def finalize_ready(store: JobStore, print_func=None) -> int:
+    """Write the manifest and folder metadata of every fully processed playlist, once."""
+    from ytmd.downloader import finalize_playlist_dir, get_playlist_dir
+    from ytmd.manifest import PlaylistManifest
+
+    if print_func is None:
+        from rich import print as rich_print
+        print_func = rich_print
+
+    finalized = 0
+    for url, title in store.claim_finalization():
+        try:
+            root_dir = get_playlist_dir(MediaInfo(None, title, url, True, []))
+            manifest = PlaylistManifest(root_dir, title=title, url=url, min_interval=float('inf'))
+            collector = {'artists': [], 'years': []}
+            for relpath, data in store.results(url):
+                tags = data.get('tags') or {}
+                manifest.add(os.path.join(root_dir, relpath), tags, duration=data.get('duration'),
+                             cover_digest=data.get('cover_digest'), replaygain=data.get('replaygain'))
+                if tags.get('artist'):
+                    collector['artists'].append(tags['artist'])
+                try:
+                    collector['years'].append(int(tags.get('year')))
+                except (TypeError, ValueError):
+                    pass
+            manifest.close()
+            finalize_playlist_dir(root_dir, collector, print_func=print_func)
+            print_func(f"[bold green]Finalized:[/bold green] {title}")
+            finalized += 1
+        except Exception as e:
+            store.unfinalize(url)
+            print_func(f"[red]Failed to finalize {title}: {e}[/red]")
+    return finalized
+
+
+def run_worker(jobs_path: str, shard: int, shards: int, options: Dict[str, Any] = None) -> None:
+    """
+    Claim, download, tag and report this shard's jobs until none are left,
+    then aggregate any playlist whose jobs are all settled.
+    """
+    from rich import print as rich_print
+    from ytmd.downloader import download_media, get_playlist_dir
+
+    def print_func(message):
+        rich_print(f"[dim]\\[{shard}/{shards}][/dim] {message}")
+
+    from ytmd.control import JobControl
+
+    options = options or {}
+    worker = f'{socket.gethostname()}:{os.getpid()}'
+    store = JobStore(jobs_path)
+    # SIGINT/SIGTERM stop the worker cooperatively; SIGUSR1 pauses it to free bandwidth for other jobs
+    control = JobControl()
+    restore_signals = control.install_signal_handlers(print_func)
+    try:
+        while not control.cancelled:
+            jobs = store.claim(shard, shards, worker)
+            if not jobs:
+                break
+
+            playlist = None
+            if jobs[0]['playlist_url']:
+                row = store.conn.execute(
+                    'SELECT url, id, title FROM playlists WHERE url = ?', (jobs[0]['playlist_url'],)
+                ).fetchone()
+                playlist = tuple(row)
+            info = _job_info(jobs, playlist)
+            root_dir = get_playlist_dir(info) if info.is_playlist else None
+            job_ids = [job['id'] for job in jobs]
+
+            reporter = JobReporter(store, jobs, root_dir)
+            try:
+                download_media(
+                    info.url, info,
+                    progress_manager=_WorkerProgress(print_func),
+                    print_func=print_func,
+                    # Each job's own video, not whatever sits at its index in the live playlist now
+                    by_id=True,
+                    manifest=reporter,
+                    playlist_outputs=False,
+                    skip_func=reporter.skip,
+                    control=control,
+                    **options
+                )
+            except KeyboardInterrupt:
+                store.release(job_ids)
+                raise
+            # Entries a cancel cut short go back to the queue instead of counting as failed
+            done, failed = store.complete(job_ids, release_missing=control.cancelled, skipped=reporter.skipped)
+            print_func(f"[cyan]{info.title}: {done} done, {failed} failed[/cyan]")
+
+        if not control.cancelled:
+            finalize_ready(store, print_func)
+    finally:
+        restore_signals()
+        store.close()
+
+
+def _worker_process(jobs_path: str, shard: int, shards: int, options: Dict[str, Any]) -> None:
+    """Entry point of local worker processes; Ctrl-C is reported by the parent."""
+    try:
+        run_worker(jobs_path, shard, shards, options)
+    except KeyboardInterrupt:
+        pass
+
+
+def run_batch(jobs_path: str, urls: List[str] = (), workers: int = 2, shard: Optional[Tuple[int, int]] = None,
+              options: Dict[str, Any] = None, print_func=None) -> None:
+    """
+    Add `urls` to the job file, then either run one shard in this process
+    (`shard=(i, n)`, e.g. one per host) or `workers` local worker processes.
+    """
+    from ytmd.downloader import fetch_info
+
+    if print_func is None:
+        from rich import print as rich_print
+        print_func = rich_print
+
+    store = JobStore(jobs_path)
+    try:
+        for url in urls:
+            try:
+                info = fetch_info(url)
+            except Exception as e:
+                print_func(f"[red]Failed to fetch {url}: {e}[/red]")
+                continue
+            added = store.add(url, info)
+            print_func(f"[cyan]Queued {added} new of {info.total_items} entries:[/cyan] {info.title or url}")
+    finally:
+        store.close()
+
+    if shard is not None:
+        run_worker(jobs_path, shard[0], shard[1], options)
+    elif workers > 0:
+        import multiprocessing
+        ctx = multiprocessing.get_context('spawn')
+        processes = [ctx.Process(target=_worker_process, args=(jobs_path, i, workers, options)) for i in range(workers)]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            # Workers get the same SIGINT and hand their claims back
+            for process in processes:
+                process.join()
+            raise
+
+    store = JobStore(jobs_path)
+    try:
+        # Catches playlists whose last jobs failed for good after their worker exited
+        finalize_ready(store, print_func)
+        counts = store.counts()
+    finally:
+        store.close()
+    summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items()))
+    print_func(f"[bold green]Batch status[/bold green] ({summary})")
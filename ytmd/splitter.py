@@ -0,0 +1,182 @@
+import os
+import re
+import subprocess
+from typing import Any, Dict, List, Optional, Tuple
+
+from yt_dlp.postprocessor.common import PostProcessor
+
+from ytmd.utils import sanitize_filename
+
+SILENCE_NOISE = '-40dB'
+SILENCE_MIN_SECONDS = 2.0
+MIN_TRACK_SECONDS = 30.0
+# Silence detection is only a fallback for long uploads (full albums, DJ mixes)
+MIN_SOURCE_SECONDS = 600.0
+
+_SILENCE_START_RE = re.compile(r'silence_start:\s*(-?[\d.]+)')
+_SILENCE_END_RE = re.compile(r'silence_end:\s*(-?[\d.]+)')
+
+# (start, end, title); end may be None for "until the end of the file"
+Segment = Tuple[float, Optional[float], str]
+
+
+def chapter_segments(info: Dict[str, Any]) -> List[Segment]:
+    """Build segments from the video's chapter metadata."""
+    segments = []
+    for i, chapter in enumerate(info.get('chapters') or [], 1):
+        start = chapter.get('start_time')
+        if start is None:
+            continue
+        title = chapter.get('title') or f'Track {i}'
+        segments.append((float(start), chapter.get('end_time'), title))
+    return segments
+
+
+def silence_segments(filepath: str, duration: Optional[float] = None) -> List[Segment]:
+    """
+    Find track boundaries with ffmpeg's silencedetect filter (one decode pass).
+    Each track starts where a silence ends, so leading and trailing silence is trimmed.
+    """
+    if duration is not None and duration < MIN_SOURCE_SECONDS:
+        return []
+
+    result = subprocess.run(
+        ['ffmpeg', '-nostats', '-hide_banner', '-i', filepath,
+         '-af', f'silencedetect=noise={SILENCE_NOISE}:d={SILENCE_MIN_SECONDS}', '-f', 'null', '-'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors='replace'
+    )
+    if result.returncode != 0:
+        return []
+
+    starts = [float(v) for v in _SILENCE_START_RE.findall(result.stderr)]
+    ends = [float(v) for v in _SILENCE_END_RE.findall(result.stderr)]
+
+    segments = []
+    track_start = 0.0
+    for i, silence_start in enumerate(starts):
+        silence_end = ends[i] if i < len(ends) else None
+        if silence_start <= 0.5:
+            # Leading silence: the first track starts after it
+            if silence_end is not None:
+                track_start = silence_end
+            continue
+        if silence_start - track_start < MIN_TRACK_SECONDS:
+            continue
+        segments.append((track_start, silence_start, f'Track {len(segments) + 1}'))
+        if silence_end is None:
+            # Silence runs to the end of the file
+            return segments
+        track_start = silence_end
+
+    if segments:
+        segments.append((track_start, None, f'Track {len(segments) + 1}'))
+    return segments
+
+
+def split_audio(filepath: str, segments: List[Segment], out_dir: str) -> List[str]:
+    """
+    Cut every segment out of `filepath` in a single ffmpeg run. The input is
+    read once and each output stream-copies its range, so nothing is re-encoded.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    cmd = ['ffmpeg', '-y', '-loglevel', 'error', '-i', filepath]
+    outputs = []
+    for n, (start, end, title) in enumerate(segments, 1):
+        name = sanitize_filename(title) or f'Track {n}'
+        out_path = os.path.join(out_dir, f'{n} - {name}.mp3')
+        cmd += ['-map', '0:a', '-c', 'copy', '-map_metadata', '-1', '-ss', f'{start:.3f}']
+        if end is not None:
+            cmd += ['-to', f'{float(end):.3f}']
+        cmd.append(out_path)
+        outputs.append(out_path)
+
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, errors='replace')
+    if result.returncode != 0:
+        for path in outputs:
+            if os.path.exists(path):
+                os.remove(path)
+        raise RuntimeError(result.stderr.strip() or f"ffmpeg exited with {result.returncode}")
+    return outputs
+
+
+def _extract_cover(filepath: str):
+    """Move the source's embedded thumbnail into the image store so pieces can reuse it."""
+    from mutagen.id3 import ID3
+    from ytmd.image_store import get_image_store
+    try:
+        frames = ID3(filepath).getall('APIC')
+        if frames:
+            return get_image_store().add_bytes(frames[0].data)
+    except Exception:
+        pass
+    return None
+
+
+class SplitChaptersPostProcessor(PostProcessor):
+    """
+    Splits full-album videos and DJ mixes into per-track MP3s using chapter
+    metadata (or silence detection as a fallback), then tags each piece with
+    the wrapped ID3TagPostProcessor. Uploads that cannot be split are passed
+    straight to the tagger.
+    """
+
+    def __init__(self, downloader=None, tagger=None, print_func=None, normalizer=None):
+        super().__init__(downloader)
+        self.tagger = tagger
+        self.print_func = print_func or __import__('rich').print
+        self.normalizer = normalizer
+
+    def run(self, info):
+        filepath = info.get('filepath')
+        if not filepath or not filepath.endswith('.mp3'):
+            return self.tagger.run(info)
+
+        segments = chapter_segments(info)
+        source = 'chapters'
+        if len(segments) < 2:
+            segments = silence_segments(filepath, info.get('duration'))
+            source = 'silence'
+        if len(segments) < 2:
+            return self.tagger.run(info)
+
+        # Chapter titles of mixes are often "Artist - Title"; clean them all in one batch
+        artists = [None] * len(segments)
+        if self.normalizer is not None:
+            normalized = self.normalizer.normalize_batch(title for _, _, title in segments)
+            artists = [artist for artist, _ in normalized]
+            segments = [(start, end, title or old) for (start, end, old), (_, title) in zip(segments, normalized)]
+
+        # Pieces go into a folder named after the source file
+        out_dir = os.path.splitext(filepath)[0]
+        try:
+            pieces = split_audio(filepath, segments, out_dir)
+        except Exception as e:
+            self.print_func(f"[red]Failed to split {os.path.basename(filepath)}: {e}[/red]")
+            return self.tagger.run(info)
+
+        self.print_func(f"[cyan]Split {info.get('title', os.path.basename(filepath))} into {len(pieces)} tracks ({source})[/cyan]")
+        cover = _extract_cover(filepath)
+        if self.tagger.use_playlist_thumb:
+            self.tagger._find_playlist_thumb(os.path.dirname(filepath))
+        os.remove(filepath)
+
+        first_path = None
+        for n, ((_, _, title), artist, piece) in enumerate(zip(segments, artists, pieces), 1):
+            piece_info = dict(info)
+            piece_info.update({
+                'filepath': piece,
+                'title': title,
+                # The source title is only a guess, applied after enrichment and never learned
+                '__ytmd_album_fallback': info.get('title'),
+                'playlist_index': n,
+                'track_number': n,
+                '__ytmd_cover': cover,
+                '__ytmd_title_artist': artist,
+                '__ytmd_split_from': info.get('playlist_index') or 1,
+            })
+            self.tagger.run(piece_info)
+            if first_path is None:
+                first_path = piece_info['filepath']
+
+        info['filepath'] = first_path
+        return [], info
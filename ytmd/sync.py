@@ -0,0 +1,379 @@
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from ytmd.downloader import fetch_info, download_media, finalize_playlist_dir, get_playlist_dir, resolve_custom_image
+from ytmd.manifest import PlaylistManifest
+
+STATE_FILENAME = '.ytmd-sync.json'
+DEFAULT_INTERVAL = 3600  # seconds between sync cycles
+
+TRACK_FILE_RE = re.compile(r'^(\d+) - (.*?)(\.mp3)?$')
+
+
+def _match_track(root_dir: str, name: str):
+    """Match "N - title.mp3" files and "N - title/" folders of split mixes."""
+    match = TRACK_FILE_RE.match(name)
+    if not match:
+        return None
+    if match.group(3) or os.path.isdir(os.path.join(root_dir, name)):
+        return match
+    return None
+
+
+def load_sync_config(path: str) -> Dict[str, Any]:
+    """
+    Load a sync config. Accepts either a list of playlist URLs or an object:
+    {"interval": 3600, "playlists": [{"url": "...", "use_playlist_thumb": true, "manual_meta": {...}, "prune": false}]}
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    if isinstance(config, list):
+        config = {'playlists': config}
+
+    playlists = []
+    for item in config.get('playlists', []):
+        if isinstance(item, str):
+            item = {'url': item}
+        if not item.get('url'):
+            continue
+        playlists.append(item)
+    config['playlists'] = playlists
+    return config
+
+
+def load_state(root_dir: str) -> Dict[str, Any]:
+    path = os.path.join(root_dir, STATE_FILENAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'signature': None, 'entries': {}}
+
+
+def save_state(root_dir: str, state: Dict[str, Any]) -> None:
+    path = os.path.join(root_dir, STATE_FILENAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _playlist_signature(entries: List[Dict[str, Any]]) -> str:
+    """Hash of the ordered entry ids, used to skip playlists that have not changed."""
+    digest = hashlib.sha1()
+    for entry in entries:
+        digest.update(entry['id'].encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _normalize(title: str) -> str:
+    return re.sub(r'\W+', '', title or '').lower()
+
+
+def _scan_track_files(root_dir: str) -> Dict[int, str]:
+    """Map track index -> name for the tracks in a playlist folder."""
+    files = {}
+    if not os.path.isdir(root_dir):
+        return files
+    for name in os.listdir(root_dir):
+        match = _match_track(root_dir, name)
+        if match:
+            files[int(match.group(1))] = name
+    return files
+
+
+def _clean_titles(info, item: Dict[str, Any], print_func) -> Dict[str, str]:
+    """Entry titles as download_media writes them into filenames (see TitleCleanupPostProcessor)."""
+    if item.get('raw_titles'):
+        return {}
+    from ytmd.titles import TitleNormalizer, load_title_normalizer
+    try:
+        normalizer = load_title_normalizer(item.get('title_rules'))
+    except Exception as e:
+        print_func(f"[red]Failed to load title rules {item.get('title_rules')}: {e}[/red]")
+        normalizer = TitleNormalizer()
+    entries = [e for e in info.valid_entries() if e.id and e.title]
+    results = normalizer.normalize_batch((e.title for e in entries), (e.artist for e in entries))
+    return {e.id: title for e, (_, title) in zip(entries, results)}
+
+
+def _adopt_existing_files(root_dir: str, entries: List[Dict[str, Any]], clean_titles: Dict[str, str] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Build initial state for a folder downloaded before sync mode, matching
+    files by title (the cleaned title the filename was built from, or the raw one).
+    """
+    by_title = {}
+    for name in _scan_track_files(root_dir).values():
+        by_title.setdefault(_normalize(TRACK_FILE_RE.match(name).group(2)), name)
+
+    clean_titles = clean_titles or {}
+    known = {}
+    for entry in entries:
+        name = by_title.get(_normalize(clean_titles.get(entry['id']) or entry['title'])) or by_title.get(_normalize(entry['title']))
+        if name:
+            index = int(TRACK_FILE_RE.match(name).group(1))
+            known[entry['id']] = {'index': index, 'file': name, 'title': entry['title']}
+    return known
+
+
+def _renumber(root_dir: str, moves: List[Dict[str, Any]], print_func) -> None:
+    """Rename and retag tracks whose playlist position changed."""
+    from mutagen.id3 import ID3, TRCK
+
+    # Two-phase rename so swapping positions never collides with an existing file
+    staged = []
+    for move in moves:
+        src = os.path.join(root_dir, move['file'])
+        tmp = os.path.join(root_dir, f".renumber-{move['new_index']}")
+        os.replace(src, tmp)
+        staged.append((tmp, move))
+
+    for tmp, move in staged:
+        match = TRACK_FILE_RE.match(move['file'])
+        new_name = f"{move['new_index']} - {match.group(2)}{match.group(3) or ''}"
+        os.replace(tmp, os.path.join(root_dir, new_name))
+        move['file'] = new_name
+        if not match.group(3):
+            # Folder of split tracks: the pieces keep their own numbering
+            continue
+        try:
+            # Same frame and ID3 version as ID3TagPostProcessor._commit
+            path = os.path.join(root_dir, new_name)
+            audio = ID3(path)
+            audio.setall('TRCK', [TRCK(encoding=3, text=str(move['new_index']))])
+            audio.save(path, v2_version=3)
+        except Exception as e:
+            print_func(f"[dim red]Failed to retag {new_name}: {e}[/dim red]")
+
+
+def _collect_folder_tags(root_dir: str, manifest: PlaylistManifest, print_func, exclude=()) -> Dict[str, Any]:
+    """
+    Artists and years of every track in the playlist, not just this cycle's
+    downloads: read from the manifest, falling back to the ID3 tags of files
+    it does not cover (folders downloaded before manifests existed). Files in
+    `exclude` (kept tracks no longer in the playlist) are not counted.
+    """
+    from mutagen.easyid3 import EasyID3
+
+    collector = {'artists': [], 'years': []}
+
+    def collect(artist, year):
+        if artist:
+            collector['artists'].append(artist)
+        try:
+            collector['years'].append(int(str(year)[:4]))
+        except (TypeError, ValueError):
+            pass
+
+    covered = set()
+    for track in manifest.tracks():
+        covered.add(track['path'].split('/', 1)[0])
+        collect(track.get('artist'), track.get('year'))
+
+    for name in _scan_track_files(root_dir).values():
+        if name in covered or name in exclude:
+            continue
+        path = os.path.join(root_dir, name)
+        if os.path.isdir(path):
+            files = [os.path.join(path, f) for f in sorted(os.listdir(path)) if f.endswith('.mp3')]
+        else:
+            files = [path]
+        for file in files:
+            try:
+                audio = EasyID3(file)
+            except Exception as e:
+                print_func(f"[dim red]Failed to read tags of {os.path.relpath(file, root_dir)}: {e}[/dim red]")
+                continue
+            collect((audio.get('artist') or [None])[0], (audio.get('date') or [None])[0])
+    return collector
+
+
+class _PublishedTracks:
+    """
+    Stands in for the playlist manifest inside download_media: forwards every
+    published track and remembers which "N - ..." file or split folder each
+    playlist position produced, so new tracks are recorded from what was
+    actually published rather than from a directory scan.
+    """
+
+    def __init__(self, manifest: PlaylistManifest):
+        self.manifest = manifest
+        self.by_index: Dict[int, str] = {}
+
+    def add(self, path: str, tags: Dict[str, Any], **kwargs) -> None:
+        self.manifest.add(path, tags, **kwargs)
+        relpath = os.path.relpath(os.path.abspath(path), os.path.abspath(self.manifest.root_dir))
+        name = relpath.split(os.sep, 1)[0]
+        match = TRACK_FILE_RE.match(name)
+        if match and not relpath.startswith('..'):
+            self.by_index[int(match.group(1))] = name
+
+    def close(self) -> None:
+        self.manifest.close()
+
+
+def sync_playlist(item: Dict[str, Any], print_func=None) -> None:
+    """
+    Bring one playlist folder in line with the remote playlist. Only new tracks
+    are downloaded and only moved tracks are renamed/retagged.
+    """
+    if print_func is None:
+        from rich import print as rich_print
+        print_func = rich_print
+
+    url = item['url']
+    info = fetch_info(url)
+    if not info.is_playlist:
+        print_func(f"[yellow]Skipping {url}: not a playlist[/yellow]")
+        return
+
+    entries = [
+        {'id': entry.id, 'title': entry.title, 'index': entry.index}
+        for entry in info.valid_entries() if entry.id
+    ]
+
+    root_dir = get_playlist_dir(info)
+    state = load_state(root_dir)
+    signature = _playlist_signature(entries)
+    title = info.title or url
+
+    if state.get('signature') == signature:
+        print_func(f"[green]Up to date:[/green] {title}")
+        return
+
+    known = state.get('entries') or {}
+    if not known and os.path.isdir(root_dir):
+        known = _adopt_existing_files(root_dir, entries, _clean_titles(info, item, print_func))
+
+    remote_ids = {e['id'] for e in entries}
+    removed = [vid for vid in known if vid not in remote_ids]
+
+    # The playlist manifest is loaded before files move so renamed entries can be followed
+    manifest = PlaylistManifest(root_dir, title=info.title, url=url)
+
+    # Records of entries removed remotely whose files were kept, by video ID and across
+    # cycles, so their files are never claimed by other entries and can be taken back
+    orphans = state.get('orphans')
+    orphans = {
+        vid: record for vid, record in (orphans.items() if isinstance(orphans, dict) else ())
+        if os.path.exists(os.path.join(root_dir, record['file']))
+    }
+    for vid in removed:
+        record = known.pop(vid)
+        if not record.get('file'):
+            continue
+        if item.get('prune'):
+            try:
+                os.remove(os.path.join(root_dir, record['file']))
+                manifest.remove(record['file'])
+                continue
+            except OSError:
+                pass
+        # The kept file leaves the exported playlist; its entries are stashed for a re-add
+        record['manifest'] = manifest.remove(record['file'])
+        orphans[vid] = record
+
+    # A re-added track takes its kept file back (renumbered below if its position changed)
+    for entry in entries:
+        if entry['id'] not in known and entry['id'] in orphans:
+            record = orphans.pop(entry['id'])
+            manifest.restore(record.pop('manifest', None) or [])
+            known[entry['id']] = record
+
+    new_entries = [e for e in entries if e['id'] not in known]
+    moves = []
+    for entry in entries:
+        record = known.get(entry['id'])
+        if record and not record.get('file'):
+            # Dropped as a duplicate: nothing on disk to renumber
+            record['index'] = entry['index']
+        elif record and record['index'] != entry['index'] and os.path.exists(os.path.join(root_dir, record['file'])):
+            moves.append({'id': entry['id'], 'file': record['file'], 'new_index': entry['index']})
+
+    print_func(f"[bold cyan]Syncing:[/bold cyan] {title} (new: {len(new_entries)}, moved: {len(moves)}, removed: {len(removed)})")
+
+    if moves:
+        old_files = [move['file'] for move in moves]
+        _renumber(root_dir, moves, print_func)
+        for old_file, move in zip(old_files, moves):
+            known[move['id']].update({'index': move['new_index'], 'file': move['file']})
+            manifest.rename(old_file, move['file'], track_number=str(move['new_index']))
+
+    if new_entries:
+        skipped = set()
+        published = _PublishedTracks(manifest)
+        sub_info = info.subset(info.entries[e['index'] - 1] for e in new_entries)
+        download_media(
+            url, sub_info,
+            print_func=print_func,
+            use_playlist_thumb=item.get('use_playlist_thumb', False),
+            manual_meta=item.get('manual_meta'),
+            custom_image_path=item.get('custom_image'),
+            playlist_items=','.join(str(e['index']) for e in new_entries),
+            replaygain=item.get('replaygain', False),
+            # Album gain from only the new tracks would not match the rest of the folder
+            album_gain=False,
+            split_chapters=item.get('split_chapters', False),
+            dedupe=item.get('dedupe'),
+            metadata_map=item.get('metadata_map'),
+            title_rules=item.get('title_rules'),
+            raw_titles=item.get('raw_titles', False),
+            manifest=published,
+            # Cover and xattrs are rebuilt below from the whole folder, not just the new tracks
+            playlist_outputs=False,
+            skip_func=lambda track: skipped.add(int(track.get('__ytmd_split_from') or track.get('playlist_index') or 0)),
+        )
+        for vid, record in list(orphans.items()):
+            if record['file'] in published.by_index.values():
+                # A new track was published under the same name and replaced the kept file
+                print_func(f"[yellow]Replaced removed track {record['file']}[/yellow]")
+                del orphans[vid]
+        for entry in new_entries:
+            name = published.by_index.get(entry['index'])
+            if name:
+                known[entry['id']] = {'index': entry['index'], 'file': name, 'title': entry['title']}
+            elif entry['index'] in skipped:
+                # Settled without a file so later cycles do not download it again
+                known[entry['id']] = {'index': entry['index'], 'file': None, 'title': entry['title'], 'skipped': True}
+
+    manifest.close()
+    finalize_playlist_dir(
+        root_dir, _collect_folder_tags(root_dir, manifest, print_func, exclude={r['file'] for r in orphans.values()}),
+        manual_meta=item.get('manual_meta'),
+        cover_image=resolve_custom_image(item.get('custom_image'), print_func),
+        print_func=print_func,
+    )
+
+    # Only mark the playlist as synced when every entry has a file on disk (or was skipped as a duplicate)
+    complete = all(e['id'] in known for e in entries)
+    os.makedirs(root_dir, exist_ok=True)
+    save_state(root_dir, {'url': url, 'signature': signature if complete else None, 'entries': known, 'orphans': orphans})
+
+
+def run_sync(config_path: str, interval: Optional[int] = None, once: bool = False, print_func=None) -> None:
+    """
+    Run the sync loop: mirror every configured playlist, then sleep until the next cycle.
+    """
+    if print_func is None:
+        from rich import print as rich_print
+        print_func = rich_print
+
+    while True:
+        config = load_sync_config(config_path)
+        for item in config['playlists']:
+            try:
+                sync_playlist(item, print_func=print_func)
+            except Exception as e:
+                print_func(f"[bold red]Sync failed for {item['url']}: {e}[/bold red]")
+
+        if once:
+            return
+        delay = interval or config.get('interval') or DEFAULT_INTERVAL
+        print_func(f"[dim]Next sync in {delay}s[/dim]")
+        time.sleep(delay)
@@ -0,0 +1,96 @@
+import json
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Bracketed noise commonly appended to YouTube titles
+_NOISE_WORDS = (
+    r'official\s*(?:music\s*)?(?:video|audio|mv|m/v|lyric\s*video|visualizer)',
+    r'(?:music|lyric|lyrics)\s*video',
+    r'm/?v',
+    r'lyrics?',
+    r'audio',
+    r'visualizer',
+    r'hd|hq|4k|1080p',
+    r'color\s*coded\s*lyrics',
+)
+
+RULE_SETS: Dict[str, List[str]] = {
+    # "(Official Video)", "[MV]", "【Lyrics】", ...
+    'noise': [r'\s*[\(\[【]\s*(?:' + '|'.join(_NOISE_WORDS) + r')\s*[\)\]】]'],
+    # Trailing "| Official Video" style suffixes
+    'suffix': [r'\s*[|｜]\s*(?:' + '|'.join(_NOISE_WORDS) + r')\s*$'],
+    # Track number prefix left by our own "N - title" filenames
+    'track_prefix': [r'^\d+\s*-\s*'],
+}
+DEFAULT_RULE_SETS = ('noise', 'suffix')
+
+TRACK_PREFIX_RE = re.compile(RULE_SETS['track_prefix'][0])
+_ARTIST_SPLIT_RE = re.compile(r'^\s*(?P<artist>.+?)\s+[-–—]\s+(?P<title>.+?)\s*$')
+_SPACES_RE = re.compile(r'\s{2,}')
+
+
+class TitleNormalizer:
+    """
+    Cleans noisy video titles with precompiled rule sets. All enabled rules are
+    joined into one alternation, so each title is scanned once regardless of
+    how many rules are configured.
+    """
+
+    def __init__(self, rule_sets: Iterable[str] = DEFAULT_RULE_SETS, patterns: Iterable[str] = (), split_artist: bool = False):
+        sources = []
+        for name in rule_sets:
+            if name not in RULE_SETS:
+                raise ValueError(f"Unknown title rule set: {name}")
+            sources.extend(RULE_SETS[name])
+        sources.extend(patterns)
+        self.split_artist = split_artist
+        self._pattern = re.compile('|'.join(f'(?:{p})' for p in sources), re.IGNORECASE) if sources else None
+
+    def clean(self, title: Optional[str]) -> str:
+        if not title:
+            return ''
+        if self._pattern is not None:
+            title = self._pattern.sub('', title)
+        return _SPACES_RE.sub(' ', title).strip()
+
+    def normalize(self, title: Optional[str], artist: Optional[str] = None) -> Tuple[Optional[str], str]:
+        """
+        Return (artist, title). When the artist is known, a matching
+        "Artist - " prefix is dropped. Splitting an "Artist - Title" pattern
+        when no artist is known is opt-in (`split_artist`), since titles like
+        "Yesterday - Remastered 2009" have the same shape.
+        """
+        cleaned = self.clean(title)
+        match = _ARTIST_SPLIT_RE.match(cleaned)
+        if not match:
+            return artist, cleaned
+        if artist is None:
+            if self.split_artist:
+                return match.group('artist'), match.group('title')
+            return artist, cleaned
+        if match.group('artist').casefold() == artist.casefold():
+            return artist, match.group('title')
+        return artist, cleaned
+
+    def normalize_batch(self, titles: Iterable[Optional[str]], artists: Iterable[Optional[str]] = None) -> List[Tuple[Optional[str], str]]:
+        """Normalize many titles at once (e.g. a whole playlist or chapter list)."""
+        titles = list(titles)
+        artists = list(artists) if artists is not None else [None] * len(titles)
+        normalize = self.normalize
+        return [normalize(t, a) for t, a in zip(titles, artists)]
+
+
+def load_title_normalizer(path: Optional[str] = None) -> TitleNormalizer:
+    """
+    Build a normalizer from a JSON rules file:
+    {"rule_sets": ["noise", "suffix"], "patterns": ["\\\\s*\\\\(Remastered\\\\)"], "split_artist": false}
+    """
+    if not path:
+        return TitleNormalizer()
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    return TitleNormalizer(
+        rule_sets=config.get('rule_sets', DEFAULT_RULE_SETS),
+        patterns=config.get('patterns', ()),
+        split_artist=config.get('split_artist', False),
+    )
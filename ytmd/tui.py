@@ -1,16 +1,17 @@
 from textual.app import App, ComposeResult
 from textual.widgets import Input, Label, Header, Footer, DataTable, ProgressBar, RichLog, Button, Checkbox
-from textual.containers import Vertical
+from textual.containers import Horizontal, Vertical
 from textual import work
 from typing import Dict, Any
+from ytmd.control import JobControl
+from ytmd.models import MediaInfo
 
 class TUIProgressHooks:
-    def __init__(self, app: "YouTubeDownloaderApp", info_dict: Dict[str, Any]):
+    def __init__(self, app: "YouTubeDownloaderApp", info: MediaInfo):
         self.app = app
-        self.is_playlist = 'entries' in info_dict
+        self.is_playlist = info.is_playlist
         if self.is_playlist:
-            entries = info_dict.get('entries', [])
-            self.total_items = sum(1 for e in entries if e is not None)
+            self.total_items = info.total_items
         else:
             self.total_items = 1
             
@@ -75,6 +76,12 @@ class YouTubeDownloaderApp(App):
     #custom_image_input {
         margin-top: 1;
     }
+    #use_replaygain {
+        margin-top: 1;
+    }
+    #split_chapters {
+        margin-top: 1;
+    }
     #manual_metadata_checkbox {
         margin-top: 1;
     }
@@ -113,8 +120,24 @@ class YouTubeDownloaderApp(App):
         margin-top: 1;
         width: 100%;
     }
+    #job_controls {
+        height: auto;
+        margin-top: 1;
+    }
+    #job_controls Button {
+        width: 1fr;
+        margin-right: 1;
+    }
     """
 
+    BINDINGS = [
+        ("f6", "toggle_pause", "Pause/Resume"),
+        ("f7", "skip_track", "Skip Track"),
+        ("f8", "cancel_download", "Cancel Download"),
+    ]
+
+    control: JobControl = None
+
     def compose(self) -> ComposeResult:
         yield Header()
         # Input Screen
@@ -126,6 +149,8 @@ class YouTubeDownloaderApp(App):
                 yield Checkbox("Use Custom Image as Album Art?", value=False, id="use_custom_image")
                 with Vertical(id="custom_image_input_container"):
                     yield Input(placeholder="Enter image path or URL...", id="custom_image_input")
+                yield Checkbox("Write ReplayGain (loudness) tags?", value=False, id="use_replaygain")
+                yield Checkbox("Split long mixes into tracks (chapters/silence)?", value=False, id="split_chapters")
                 yield Checkbox("Set metadata manually?", value=False, id="manual_metadata_checkbox")
                 with Vertical(id="manual_metadata_inputs"):
                     yield Input(placeholder="Artist", id="meta_artist", classes="meta-input")
@@ -144,6 +169,10 @@ class YouTubeDownloaderApp(App):
             yield ProgressBar(id="current_file_progress")
             
             yield RichLog(id="log_view", markup=True)
+            with Horizontal(id="job_controls"):
+                yield Button("Pause", id="pause_button")
+                yield Button("Skip Track", id="skip_button")
+                yield Button("Cancel", id="cancel_button", variant="error")
             yield Button("Return to Home (Download More)", id="back_button", variant="primary", classes="hidden")
             
         yield Footer()
@@ -181,6 +210,8 @@ class YouTubeDownloaderApp(App):
             return
             
         use_playlist_thumb = self.query_one("#use_playlist_thumb", Checkbox).value
+        replaygain = self.query_one("#use_replaygain", Checkbox).value
+        split_chapters = self.query_one("#split_chapters", Checkbox).value
         
         custom_image_path = None
         if self.query_one("#use_custom_image", Checkbox).value:
@@ -196,7 +227,8 @@ class YouTubeDownloaderApp(App):
             
         self.query_one("#input_view").styles.display = "none"
         self.query_one("#download_view").styles.display = "block"
-        self.run_download(url, use_playlist_thumb, manual_meta, custom_image_path)
+        self.control = JobControl()
+        self.run_download(url, use_playlist_thumb, manual_meta, custom_image_path, replaygain, split_chapters)
             
     def tui_print(self, text: str):
         """Redirect print statements to the RichLog."""
@@ -204,7 +236,7 @@ class YouTubeDownloaderApp(App):
         log_view.write(text)
 
     @work(thread=True)
-    def run_download(self, url: str, use_playlist_thumb: bool = True, manual_meta: Dict[str, str] = None, custom_image_path: str = None) -> None:
+    def run_download(self, url: str, use_playlist_thumb: bool = True, manual_meta: Dict[str, str] = None, custom_image_path: str = None, replaygain: bool = False, split_chapters: bool = False) -> None:
         from ytmd.downloader import fetch_info, download_media
         
         self.call_from_thread(self.tui_print, f"Started fetching info for: {url}")
@@ -218,8 +250,13 @@ class YouTubeDownloaderApp(App):
             def update_tags(idx: str, tags: dict):
                 self.call_from_thread(self.update_row_status, idx, tags)
                 
-            download_media(url, info, progress_manager=pm, print_func=self.tui_print, update_tags_func=update_tags, use_playlist_thumb=use_playlist_thumb, manual_meta=manual_meta, custom_image_path=custom_image_path)
+            control = self.control
+            download_media(url, info, progress_manager=pm, print_func=self.tui_print, update_tags_func=update_tags, use_playlist_thumb=use_playlist_thumb, manual_meta=manual_meta, custom_image_path=custom_image_path, replaygain=replaygain, split_chapters=split_chapters, control=control)
             
+            if control is not None and control.cancelled:
+                self.call_from_thread(self.tui_print, "[bold yellow]Download Cancelled.[/bold yellow]")
+                self.call_from_thread(self.show_finish_button)
+                return
             self.call_from_thread(self.tui_print, "[bold green]Download Process Completed![/bold green]")
             self.call_from_thread(self.show_finish_button)
         except Exception as e:
@@ -227,14 +264,76 @@ class YouTubeDownloaderApp(App):
             self.call_from_thread(self.show_finish_button)
 
     def show_finish_button(self):
+        self.control = None
+        self.query_one("#job_controls").add_class("hidden")
         self.query_one("#back_button", Button).remove_class("hidden")
 
+    def action_toggle_pause(self) -> None:
+        if self.control is None or self.control.cancelled:
+            return
+        paused = self.control.toggle_pause()
+        self.query_one("#pause_button", Button).label = "Resume" if paused else "Pause"
+        if paused:
+            self.query_one("#status_label", Label).update("[bold yellow]Paused[/bold yellow]")
+            self.tui_print("[yellow]Paused. Network and CPU are released until you resume.[/yellow]")
+        else:
+            self.query_one("#status_label", Label).update("[bold green]Downloading...[/bold green]")
+            self.tui_print("[cyan]Resumed.[/cyan]")
+
+    def action_skip_track(self) -> None:
+        if self.control is None or self.control.cancelled:
+            return
+        index = self.control.skip_current()
+        if index is not None:
+            self.mark_row_skipped(str(index))
+            self.tui_print(f"[yellow]Skipping track {index}...[/yellow]")
+
+    def action_cancel_download(self) -> None:
+        if self.control is None or self.control.cancelled:
+            return
+        self.control.cancel()
+        self.query_one("#status_label", Label).update("[bold yellow]Cancelling...[/bold yellow]")
+        self.tui_print("[yellow]Cancelling: finished tracks are kept, partial files are removed.[/yellow]")
+
+    def on_data_table_row_selected(self, event: DataTable.RowSelected) -> None:
+        """Selecting a queued track toggles whether it will be skipped."""
+        if self.control is None or self.control.cancelled:
+            return
+        idx = event.row_key.value
+        if self.control.is_skipped(int(idx)):
+            self.control.unskip(int(idx))
+            self.query_one("#summary_table", DataTable).update_cell(row_key=idx, column_key="title", value="-")
+            self.tui_print(f"[cyan]Track {idx} will be downloaded.[/cyan]")
+        else:
+            self.control.skip(int(idx))
+            self.mark_row_skipped(idx)
+            self.tui_print(f"[yellow]Track {idx} will be skipped.[/yellow]")
+
+    def mark_row_skipped(self, idx: str) -> None:
+        try:
+            self.query_one("#summary_table", DataTable).update_cell(row_key=idx, column_key="title", value="(skipped)")
+        except Exception:
+            pass
+
+    def on_unmount(self) -> None:
+        # Quitting mid-download stops the worker thread at its next checkpoint so staging is cleaned up
+        if self.control is not None:
+            self.control.cancel()
+
     def on_button_pressed(self, event: Button.Pressed) -> None:
-        if event.button.id == "back_button":
+        if event.button.id == "pause_button":
+            self.action_toggle_pause()
+        elif event.button.id == "skip_button":
+            self.action_skip_track()
+        elif event.button.id == "cancel_button":
+            self.action_cancel_download()
+        elif event.button.id == "back_button":
             # 1. Reset widgets
             self.query_one("#url_input", Input).value = ""
             self.query_one("#use_playlist_thumb", Checkbox).value = False
             self.query_one("#use_custom_image", Checkbox).value = False
+            self.query_one("#use_replaygain", Checkbox).value = False
+            self.query_one("#split_chapters", Checkbox).value = False
             self.query_one("#custom_image_input", Input).value = ""
             self.query_one("#manual_metadata_checkbox", Checkbox).value = False
             self.query_one("#meta_artist", Input).value = ""
@@ -257,13 +356,16 @@ class YouTubeDownloaderApp(App):
             
             self.query_one("#log_view", RichLog).clear()
             self.query_one("#back_button", Button).add_class("hidden")
+            self.query_one("#pause_button", Button).label = "Pause"
+            self.query_one("#job_controls").remove_class("hidden")
+            self.control = None
             
             # 2. Switch views
             self.query_one("#download_view").styles.display = "none"
             self.query_one("#input_view").styles.display = "block"
             self.query_one("#url_input").focus()
 
-    def update_summary_table(self, info_dict: Dict[str, Any]) -> None:
+    def update_summary_table(self, info: MediaInfo) -> None:
         self.query_one("#status_label", Label).update("[bold green]Metadata fetched. Downloading...[/bold green]")
         table = self.query_one("#summary_table", DataTable)
         table.add_column("Index", key="index")
@@ -275,19 +377,14 @@ class YouTubeDownloaderApp(App):
         table.add_column("Year", key="year")
         table.add_column("Track", key="track")
         
-        if 'entries' in info_dict:
-            self.tui_print(f"[bold yellow]Playlist Detected:[/bold yellow] {info_dict.get('title', 'Unknown')}")
-            entries = info_dict.get('entries', [])
-            for i, entry in enumerate(entries, 1):
-                if not entry: continue
-                title = entry.get('title', 'Unknown')
-                duration = str(entry.get('duration', 'N/A'))
-                table.add_row(str(i), title, duration, "-", "-", "-", "-", "-", key=str(i))
+        if info.is_playlist:
+            self.tui_print(f"[bold yellow]Playlist Detected:[/bold yellow] {info.title}")
         else:
             self.tui_print("[bold yellow]Single Video Detected[/bold yellow]")
-            title = info_dict.get('title', 'Unknown')
-            duration = str(info_dict.get('duration', 'N/A'))
-            table.add_row("1", title, duration, "-", "-", "-", "-", "-", key="1")
+
+        for entry in info.valid_entries():
+            duration = str(entry.duration) if entry.duration is not None else 'N/A'
+            table.add_row(str(entry.index), entry.title, duration, "-", "-", "-", "-", "-", key=str(entry.index))
 
     def update_row_status(self, idx: str, tags: dict) -> None:
         try:
@@ -336,6 +433,7 @@ def run_tui_app(url: str = None):
         def trigger_download_on_mount():
             app.query_one("#input_view").styles.display = "none"
             app.query_one("#download_view").styles.display = "block"
+            app.control = JobControl()
             app.run_download(url, use_playlist_thumb=True) # Default from CLI
         # Schedule the action on mount
         app.call_after_refresh(trigger_download_on_mount)
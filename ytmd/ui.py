@@ -9,29 +9,25 @@ from rich.progress import (
     TaskID
 )
 from typing import Dict, Any
+from ytmd.models import MediaInfo
 
-def display_summary_table(info_dict: Dict[str, Any]) -> None:
+def display_summary_table(info: MediaInfo) -> None:
     """Displays a pre-download summary table."""
     table = Table(title="Download Target Summary", show_lines=True)
     table.add_column("Index", justify="center", style="cyan", no_wrap=True)
     table.add_column("Title", style="magenta")
     table.add_column("Duration (s)", justify="right", style="green")
 
-    if 'entries' in info_dict:
+    if info.is_playlist:
         # It's a playlist
-        print(f"[bold yellow]Playlist Detected:[/bold yellow] {info_dict.get('title', 'Unknown')}")
-        entries = info_dict.get('entries', [])
-        for i, entry in enumerate(entries, 1):
-            if not entry: continue
-            title = entry.get('title', 'Unknown')
-            duration = str(entry.get('duration', 'N/A'))
-            table.add_row(str(i), title, duration)
+        print(f"[bold yellow]Playlist Detected:[/bold yellow] {info.title}")
     else:
         # Single Video
         print("[bold yellow]Single Video Detected[/bold yellow]")
-        title = info_dict.get('title', 'Unknown')
-        duration = str(info_dict.get('duration', 'N/A'))
-        table.add_row("1", title, duration)
+
+    for entry in info.valid_entries():
+        duration = str(entry.duration) if entry.duration is not None else 'N/A'
+        table.add_row(str(entry.index), entry.title, duration)
 
     if table.row_count > 0:
         print(table)
@@ -42,16 +38,15 @@ def display_summary_table(info_dict: Dict[str, Any]) -> None:
 class DownloadProgressManager:
     """Manages the Rich progress bars for downloads."""
     
-    def __init__(self, info_dict: Dict[str, Any]):
-        self.is_playlist = 'entries' in info_dict
+    def __init__(self, info: MediaInfo):
+        self.is_playlist = info.is_playlist
         if self.is_playlist:
             # count valid entries (ignoreerrors leaves None for blocked videos)
-            entries = info_dict.get('entries', [])
-            self.total_items = sum(1 for e in entries if e is not None)
-            self.overall_title = info_dict.get('title', 'Playlist')
+            self.total_items = info.total_items
+            self.overall_title = info.title or 'Playlist'
         else:
             self.total_items = 1
-            self.overall_title = info_dict.get('title', 'Video')
+            self.overall_title = info.title or 'Video'
             
         self.progress = Progress(
             TextColumn("[progress.description]{task.description}"),
@@ -1,9 +1,11 @@
 import re
 
+_UNSAFE_CHARS_RE = re.compile(r'[\\/*?:"<>|]')
+
 def sanitize_filename(name: str) -> str:
     """Removes special characters from filenames that might be problematic."""
     # yt-dlp's restrictfilenames config does this, but keeping a helper is good
     if not name:
         return ""
-    name = re.sub(r'[\\/*?:"<>|]', "", name)
+    name = _UNSAFE_CHARS_RE.sub("", name)
     return name.strip()